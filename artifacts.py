@@ -0,0 +1,159 @@
+import os
+import gzip
+import time
+import queue
+import pickle
+import random
+import threading
+
+import neat
+
+class ArtifactWriter:
+    """
+    Writes run artifacts from a background thread so training never waits on disk. Appended rows are
+    batched per file and fsynced every `flush_interval` seconds, so a crash loses at most one interval;
+    whole files are written beside their target and renamed into place once complete.
+    """
+
+    def __init__(self,flush_interval:float = 5.0):
+        self.flush_interval = flush_interval
+        self.queue          = queue.Queue()
+        self.pending        = {}
+        self.files          = {}
+        self.thread         = None
+        self.error          = None
+
+    def put(self,job:tuple):
+        if self.error:
+            raise RuntimeError("Artifact writer failed") from self.error
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.loop, name='artifact-writer', daemon=True)
+            self.thread.start()
+        self.queue.put(job)
+
+    def append(self,path:str,text:str,header:str = None):
+        """ Queues `text` for the end of `path`; `header` is written first if the file is new or empty. """
+        self.put(('append', path, text, header))
+
+    def write(self,path:str,data:bytes,compress:bool = False):
+        """ Queues a whole file, gzipped on the writer thread when `compress` is set. """
+        self.put(('write', path, data, compress))
+
+    def submit(self,function,*args):
+        """ Runs `function(*args)` on the writer thread, after everything queued before it. """
+        self.put(('call', function, args))
+
+    def drain(self):
+        """ Blocks until everything queued so far is on disk. """
+        if self.thread is None:
+            return
+        done = threading.Event()
+        self.put(('flush', done))
+        done.wait()
+        if self.error:
+            raise RuntimeError("Artifact writer failed") from self.error
+
+    def close(self):
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+        if self.error:
+            raise RuntimeError("Artifact writer failed") from self.error
+
+    def loop(self):
+        deadline = time.monotonic() + self.flush_interval
+        running  = True
+        while running:
+            try:
+                jobs = [self.queue.get(timeout=max(0.0, deadline - time.monotonic()))]
+            except queue.Empty:
+                jobs = []
+
+            # Everything already waiting is handled in the same batch
+            while True:
+                try:
+                    jobs.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            flushed = []
+            try:
+                for job in jobs:
+                    if job is None:
+                        running = False
+                    elif job[0] == 'append':
+                        self.pending.setdefault(job[1], []).append(job)
+                    elif job[0] == 'write':
+                        self.write_file(*job[1:])
+                    elif job[0] == 'call':
+                        job[1](*job[2])
+                    elif job[0] == 'flush':
+                        flushed.append(job[1])
+
+                if flushed or not running or time.monotonic() >= deadline:
+                    self.flush()
+                    deadline = time.monotonic() + self.flush_interval
+            except Exception as error:
+                self.error = error
+                running    = False
+            finally:
+                for done in flushed:
+                    done.set()
+
+        for file in self.files.values():
+            file.close()
+        self.files = {}
+
+        # Anything queued after a failure would never be written, release whoever waits on it
+        while not self.queue.empty():
+            job = self.queue.get_nowait()
+            if job and job[0] == 'flush':
+                job[1].set()
+
+    def flush(self):
+        for path, jobs in self.pending.items():
+            if path not in self.files:
+                os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                self.files[path] = open(path, 'a', newline='')
+            file = self.files[path]
+            if file.tell() == 0 and jobs[0][3]:
+                file.write(jobs[0][3])
+            file.write(''.join(job[2] for job in jobs))
+            file.flush()
+            os.fsync(file.fileno())
+        self.pending = {}
+
+    def write_file(self,path:str,data:bytes,compress:bool):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if compress:
+            data = gzip.compress(data, compresslevel=5)
+
+        temp_path = f"{path}.part"
+        with open(temp_path, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+
+class AsyncCheckpointer(neat.Checkpointer):
+    """ neat.Checkpointer that only pickles on the training thread; compression and disk are left to the writer. """
+
+    def __init__(self,writer:ArtifactWriter,generation_interval:int = 100,time_interval_seconds:float = 300,
+                 filename_prefix:str = 'neat-checkpoint-'):
+        super().__init__(generation_interval, time_interval_seconds, filename_prefix)
+        self.writer = writer
+
+    def __getstate__(self):
+        # The species set keeps its reporters, this one included, and is pickled into every checkpoint
+        state = dict(self.__dict__)
+        state["writer"] = None
+        return state
+
+    def save_checkpoint(self,config,population,species_set,generation):
+        # Pickled now, so later generations mutating the population can't reach the snapshot
+        filename = f"{self.filename_prefix}{generation}"
+        data     = pickle.dumps((generation, config, population, species_set, random.getstate()),
+                                protocol=pickle.HIGHEST_PROTOCOL)
+        print(f"Saving checkpoint to {filename}")
+        self.writer.write(filename, data, compress=True)
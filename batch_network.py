@@ -0,0 +1,200 @@
+import numpy as np
+import neat
+
+from neat.graphs import feed_forward_layers
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-np.clip(5.0 * z, -60.0, 60.0)))
+
+def _tanh(z):
+    return np.tanh(np.clip(2.5 * z, -60.0, 60.0))
+
+def _sin(z):
+    return np.sin(np.clip(5.0 * z, -60.0, 60.0))
+
+def _gauss(z):
+    return np.exp(-5.0 * np.clip(z, -3.4, 3.4)**2)
+
+def _relu(z):
+    return np.where(z > 0.0, z, 0.0)
+
+def _identity(z):
+    return z
+
+def _clamped(z):
+    return np.clip(z, -1.0, 1.0)
+
+def _abs(z):
+    return np.abs(z)
+
+def _square(z):
+    return z**2
+
+# Vectorized counterparts of neat.activations, in the same order they are coded per node
+ACTIVATIONS = {
+    "sigmoid"  : _sigmoid,
+    "tanh"     : _tanh,
+    "sin"      : _sin,
+    "gauss"    : _gauss,
+    "relu"     : _relu,
+    "identity" : _identity,
+    "clamped"  : _clamped,
+    "abs"      : _abs,
+    "square"   : _square,
+}
+ACTIVATION_CODES = {name: code for code, name in enumerate(ACTIVATIONS)}
+
+class BatchNetwork:
+    """ A population of feed-forward genomes compiled into padded, layered weight matrices. """
+
+    def __init__(self,
+                 genomes : list[tuple[int,neat.genome.DefaultGenome]],
+                 config  : neat.Config):
+
+        genome_config = config.genome_config
+        input_keys    = genome_config.input_keys
+        output_keys   = genome_config.output_keys
+
+        self.count       = len(genomes)
+        self.num_inputs  = len(input_keys)
+        self.num_outputs = len(output_keys)
+
+        compiled = [self.compile_genome(genome, input_keys, output_keys) for _, genome in genomes]
+
+        # Value slots: inputs, outputs, hidden nodes, then one scratch slot padding writes land in
+        max_hidden      = max((len(slots) - self.num_inputs - self.num_outputs for slots, _ in compiled), default=0)
+        self.num_slots  = self.num_inputs + self.num_outputs + max_hidden + 1
+        self.scratch    = self.num_slots - 1
+        self.num_layers = max((len(layers) for _, layers in compiled), default=0)
+
+        self.weights     = []
+        self.biases      = []
+        self.responses   = []
+        self.activations = []
+        self.targets     = []
+
+        for depth in range(self.num_layers):
+            width = max(len(layers[depth]) for _, layers in compiled if depth < len(layers))
+
+            weights     = np.zeros((self.count, width, self.num_slots))
+            biases      = np.zeros((self.count, width))
+            responses   = np.zeros((self.count, width))
+            activations = np.full((self.count, width), -1)
+            targets     = np.full((self.count, width), self.scratch)
+
+            for row, (slots, layers) in enumerate(compiled):
+                if depth >= len(layers):
+                    continue
+                for column, (node, activation, bias, response, links) in enumerate(layers[depth]):
+                    for source, weight in links:
+                        weights[row, column, slots[source]] += weight
+                    biases[row, column]      = bias
+                    responses[row, column]   = response
+                    activations[row, column] = activation
+                    targets[row, column]     = slots[node]
+
+            self.weights.append(weights)
+            self.biases.append(biases)
+            self.responses.append(responses)
+            # Only the activations present in a layer are evaluated; padding (-1) is never written back
+            self.activations.append([(ACTIVATIONS[name], activations == code)
+                                     for name, code in ACTIVATION_CODES.items() if (activations == code).any()])
+            self.targets.append(targets)
+
+        # Rows the compacted layer tensors hold, starting with every genome, and each genome's position in them (-1 if dropped)
+        self.rows   = np.arange(self.count)
+        self.slot   = np.arange(self.count)
+        self.layers = list(zip(self.weights, self.biases, self.responses, self.activations, self.targets))
+
+        # Gather indices of the last subset run dense, active sets repeat for many ticks
+        self.last   = None
+        self.gather = None
+
+    def compile_genome(self, genome, input_keys, output_keys):
+        connections = [cg.key for cg in genome.connections.values() if cg.enabled]
+
+        slots = {key: index for index, key in enumerate(list(input_keys) + list(output_keys))}
+        layers = []
+        for layer in feed_forward_layers(input_keys, output_keys, connections):
+            nodes = []
+            for node in sorted(layer):
+                gene = genome.nodes[node]
+                if gene.aggregation != "sum":
+                    raise ValueError(f"Batch inference only supports sum aggregation, got '{gene.aggregation}'")
+                if gene.activation not in ACTIVATION_CODES:
+                    raise ValueError(f"Batch inference has no vectorized '{gene.activation}' activation")
+
+                links = [(inode, genome.connections[(inode, onode)].weight) for inode, onode in connections if onode == node]
+                slots.setdefault(node, len(slots))
+                nodes.append((node, ACTIVATION_CODES[gene.activation], gene.bias, gene.response, links))
+            layers.append(nodes)
+
+        return slots, layers
+
+    def compact(self,rows:np.ndarray):
+        """
+        Fits the held layer tensors to `rows`. A dense subset of them runs the full pass and gets the
+        (input source, output index) arrays that move its rows in and out; None means `rows` are exactly
+        the held rows. Tensors are only copied down once fewer than half of the held rows are asked for.
+        """
+        if len(rows) == len(self.rows) and (rows == self.rows).all():
+            return None
+        if self.last is not None and len(rows) == len(self.last) and (rows == self.last).all():
+            return self.gather
+
+        positions = self.slot[rows]
+        if 2 * len(rows) > len(self.rows) and (positions >= 0).all():
+            # Held rows not asked for read the zero row appended after the inputs
+            source            = np.full(len(self.rows), len(rows))
+            source[positions] = np.arange(len(rows))
+            outputs           = positions[:, None] * self.num_slots + self.num_inputs + np.arange(self.num_outputs)
+            self.last, self.gather = rows.copy(), (source, outputs.ravel())
+            return self.gather
+
+        self.rows       = np.array(rows)
+        self.slot       = np.full(self.count, -1)
+        self.slot[rows] = np.arange(len(rows))
+        self.last       = None
+        if len(rows) == self.count and (self.rows == np.arange(self.count)).all():
+            self.layers = list(zip(self.weights, self.biases, self.responses, self.activations, self.targets))
+        else:
+            self.layers = [(weights[rows], biases[rows], responses[rows],
+                            [(function, mask[rows]) for function, mask in activations], targets[rows])
+                           for weights, biases, responses, activations, targets in
+                           zip(self.weights, self.biases, self.responses, self.activations, self.targets)]
+        return None
+
+    def activate(self, inputs:np.ndarray, rows:np.ndarray = None) -> np.ndarray:
+        """ Evaluates the networks at `rows` (all by default) on stacked inputs, returning stacked outputs. """
+        rows   = np.arange(self.count) if rows is None else np.asarray(rows, dtype=int)
+        gather = self.compact(rows)
+        inputs = np.asarray(inputs, dtype=float)
+
+        values = np.zeros((len(self.rows), self.num_slots))
+        if gather is None:
+            values[:, :self.num_inputs] = inputs
+        else:
+            padded = np.zeros((len(rows) + 1, self.num_inputs))
+            padded[:-1] = inputs
+            values[:, :self.num_inputs] = padded.take(gather[0], axis=0)
+        batch = np.arange(len(self.rows))[:, None]
+
+        for weights, biases, responses, activations, targets in self.layers:
+            z = biases + responses * np.einsum('ksm,km->ks', weights, values)
+
+            if len(activations) == 1 and activations[0][1].all():
+                out = activations[0][0](z)
+            else:
+                out = np.zeros_like(z)
+                for function, mask in activations:
+                    out[mask] = function(z[mask])
+
+            values[batch, targets] = out
+
+        if gather is None:
+            return values[:, self.num_inputs:self.num_inputs + self.num_outputs]
+        return values.take(gather[1]).reshape(len(rows), self.num_outputs)
+
+def throttles(outputs:np.ndarray) -> tuple[np.ndarray,np.ndarray]:
+    throttle = np.clip((outputs + 1) / 2, 0.0, 1.0)
+    return throttle[:,0], throttle[:,1]
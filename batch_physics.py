@@ -0,0 +1,180 @@
+import random
+import numpy as np
+import pygame
+import pymunk
+
+from fitness import fitness_kernel
+from terrain import TerrainQuery
+from lander import LANDER_SIZE,LANDER_VERTICES,ENGINE_POINTS,MAX_ANGULAR_VEL,spawn_state
+
+def polygon_centroid(vertices:np.ndarray) -> np.ndarray:
+    x, y   = vertices[:,0], vertices[:,1]
+    xn, yn = np.roll(x,-1), np.roll(y,-1)
+    cross  = x * yn - xn * y
+    area   = cross.sum() / 2
+    return np.array([((x + xn) * cross).sum(), ((y + yn) * cross).sum()]) / (6 * area)
+
+class BatchLanderPhysics:
+    """ Struct-of-arrays lander population stepped with NumPy instead of one pymunk body per lander. """
+
+    def __init__(self,
+                 ids     : list[int],
+                 config,
+                 width   : int,
+                 gravity : float,
+                 seed    = None):
+
+        self.ids     = list(ids)
+        self.count   = len(self.ids)
+        self.width   = width
+        self.gravity = gravity
+
+        self.dry_weight        = int(config['LANDER']['dry_weight'])
+        self.fuel_level        = int(config['LANDER']['fuel_level'])
+        self.engine_force      = int(config['LANDER']['max_engine_power'])
+        self.max_land_vel      = int(config['LANDER']['max_land_vel'])
+        self.fuel_consume_rate = float(config['LANDER'].get('fuel_consume_rate', fallback=0))
+        self.max_init_velocity = int(config['SIMULATION']['max_init_velocity'])
+
+        self.w, self.h = LANDER_SIZE
+
+        # Body-local geometry relative to the centre of gravity, as pymunk places it for a single Poly
+        vertices         = np.array(LANDER_VERTICES, dtype=float)
+        self.cog_local   = polygon_centroid(vertices)
+        self.corners     = vertices - self.cog_local
+        self.engines_x   = np.array(ENGINE_POINTS, dtype=float)[:,0] - self.cog_local[0]
+        self.unit_moment = pymunk.moment_for_poly(1, self.corners.tolist())
+
+        spawn_x, spawn_y, spawn_vx, spawn_vy, spawn_angle = [], [], [], [], []
+        for genome_id in self.ids:
+            position,velocity,angle = spawn_state(random.Random(f"{seed}-{genome_id}"),config,width)
+            spawn_x.append(position[0])
+            spawn_y.append(position[1])
+            spawn_vx.append(velocity[0])
+            spawn_vy.append(velocity[1])
+            spawn_angle.append(angle)
+
+        self.angle       = np.array(spawn_angle, dtype=float)
+        self.angular_vel = np.zeros(self.count)
+        self.vx          = np.array(spawn_vx, dtype=float)
+        self.vy          = np.array(spawn_vy, dtype=float)
+
+        cog_x, cog_y = self.rotate(self.cog_local[0], self.cog_local[1])
+        self.x       = np.array(spawn_x, dtype=float) + cog_x
+        self.y       = np.array(spawn_y, dtype=float) + cog_y
+
+        self.fuel = np.full(self.count, float(self.fuel_level))
+        self.mass = self.dry_weight + self.fuel
+
+        self.throttle_l = np.zeros(self.count)
+        self.throttle_r = np.zeros(self.count)
+
+        self.alive               = np.ones(self.count, dtype=bool)
+        self.landed              = np.zeros(self.count, dtype=bool)
+        self.land_velocity       = np.full(self.count, float(self.max_init_velocity))
+        self.distance_to_surface = np.zeros(self.count)
+        self.cause_of_death      = np.full(self.count, "NA", dtype=object)
+
+        self.terrain:TerrainQuery = None
+
+    def set_terrain(self,terrain:TerrainQuery):
+        self.terrain = terrain
+
+    def rotate(self,local_x,local_y,indices=slice(None)):
+        sin, cos = np.sin(self.angle[indices]), np.cos(self.angle[indices])
+        return cos * local_x - sin * local_y, sin * local_x + cos * local_y
+
+    def positions(self):
+        cog_x, cog_y = self.rotate(self.cog_local[0], self.cog_local[1])
+        return self.x - cog_x, self.y - cog_y
+
+    def active(self) -> np.ndarray:
+        return self.alive & ~self.landed
+
+    def kill(self,mask:np.ndarray,msg:str):
+        self.alive[mask]          = False
+        self.cause_of_death[mask] = msg
+
+    def touch_down(self,indices:np.ndarray,velocity:np.ndarray):
+        self.landed[indices]              = True
+        self.land_velocity[indices]       = velocity
+        self.distance_to_surface[indices] = 0.0
+        self.vx[indices]                  = 0.0
+        self.vy[indices]                  = 0.0
+        self.angular_vel[indices]         = 0.0
+
+    def update(self):
+        pos_x, pos_y = self.positions()
+        pos_x, pos_y = np.trunc(pos_x), np.trunc(pos_y)
+
+        self.kill(self.alive & (self.angular_vel > MAX_ANGULAR_VEL), "ang vel exceed")
+        self.kill(self.alive & ((pos_x <= 0) | (pos_x >= self.terrain.x_end)), "escaped the universe")
+        self.kill(self.alive & self.landed & (self.land_velocity > self.max_land_vel), "landed in too hot")
+
+        flying = self.active()
+        self.distance_to_surface[flying] = self.terrain.heights_at(pos_x[flying]) - pos_y[flying] - self.h/2
+
+    def sensors(self,indices:np.ndarray) -> np.ndarray:
+        return np.column_stack((self.distance_to_surface[indices], self.vx[indices], self.vy[indices],
+                                self.angle[indices], self.angular_vel[indices], self.fuel[indices]))
+
+    def step(self,dt:float):
+        flying = np.flatnonzero(self.active())
+        if flying.size == 0:
+            return
+
+        out_of_fuel = self.fuel[flying] <= 0
+        self.throttle_l[flying[out_of_fuel]] = 0.0
+        self.throttle_r[flying[out_of_fuel]] = 0.0
+
+        force_l = self.engine_force * self.throttle_l[flying]
+        force_r = self.engine_force * self.throttle_r[flying]
+        thrust  = force_l + force_r
+
+        # Forces are resolved with the pre-step angle, like apply_force_at_local_point
+        force_x, force_y = self.rotate(0.0, -thrust, flying)
+        torque           = -(self.engines_x[0] * force_l + self.engines_x[1] * force_r)
+
+        self.fuel[flying] = np.maximum(0.0, self.fuel[flying] - (self.throttle_l[flying] + self.throttle_r[flying]) * self.fuel_consume_rate * dt)
+        self.mass[flying] = self.dry_weight + self.fuel[flying]
+
+        # pymunk order: integrate positions, detect contacts, then integrate velocities
+        self.x[flying]     += self.vx[flying] * dt
+        self.y[flying]     += self.vy[flying] * dt
+        self.angle[flying] += self.angular_vel[flying] * dt
+
+        self.collide(flying)
+
+        # Landers that touched down this step are held by the terrain
+        still  = ~self.landed[flying]
+        flying = flying[still]
+        mass   = self.mass[flying]
+
+        self.vx[flying]          += (force_x[still] / mass) * dt
+        self.vy[flying]          += (self.gravity + force_y[still] / mass) * dt
+        self.angular_vel[flying] += (torque[still] / (self.unit_moment * mass)) * dt
+
+    def collide(self,indices:np.ndarray):
+        corner_x, corner_y = self.rotate(self.corners[:,0][None,:], self.corners[:,1][None,:], indices[:,None])
+        corner_x += self.x[indices,None]
+        corner_y += self.y[indices,None]
+
+        touched = (corner_y >= self.terrain.heights_at(corner_x)).any(axis=1)
+        hit     = indices[touched]
+
+        self.landed[hit]        = True
+        self.land_velocity[hit] = np.hypot(self.vx[hit], self.vy[hit])
+        self.vx[hit]            = 0.0
+        self.vy[hit]            = 0.0
+        self.angular_vel[hit]   = 0.0
+
+    def evaluate(self) -> np.ndarray:
+        velocity = np.where(self.landed, self.land_velocity, np.hypot(self.vx, self.vy))
+        return fitness_kernel(self.distance_to_surface, velocity, self.landed)
+
+    def draw(self,screen:pygame.Surface) -> list[pygame.Rect]:
+        rects = []
+        for i in np.flatnonzero(self.alive):
+            corner_x, corner_y = self.rotate(self.corners[:,0], self.corners[:,1], i)
+            rects.append(pygame.draw.polygon(screen, 'white', list(zip(corner_x + self.x[i], corner_y + self.y[i])), 1))
+        return rects
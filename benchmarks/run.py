@@ -0,0 +1,308 @@
+import os
+import sys
+import io
+import gc
+import json
+import time
+import types
+import random
+import argparse
+import platform
+import statistics
+import configparser
+import contextlib
+
+import neat
+import numpy as np
+import pymunk
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from batch_network import BatchNetwork
+from simulation import GeneticSimulation
+
+HIGHER, LOWER = 'higher', 'lower'
+
+class Suite:
+    """ Headless benchmarks of the simulation hot paths, every genome, terrain and input derived from one seed. """
+
+    def __init__(self,config:configparser.SectionProxy):
+        self.config   = config
+        self.seed     = config.getint('seed', fallback=1234)
+        self.repeats  = config.getint('repeats', fallback=5)
+        self.warmup   = config.getint('warmup', fallback=1)
+        self.sims     = {}
+        self.results  = {}
+
+    def simulation(self,backend:str) -> GeneticSimulation:
+        if backend not in self.sims:
+            sim = GeneticSimulation(self.config['simulation_config'],
+                                    self.config['lander_config'],
+                                    self.config['terrain_config'],
+                                    headless=True,
+                                    backend=backend,
+                                    seed=self.seed)
+            # Terrains are always generated, a warm cache on disk would hide their cost
+            sim.terrain_cache = None
+            self.sims[backend] = sim
+        return self.sims[backend]
+
+    def neat_config(self,population:int) -> neat.Config:
+        config = neat.Config(neat.DefaultGenome, neat.DefaultReproduction,
+                             neat.DefaultSpeciesSet, neat.DefaultStagnation,
+                             self.config['simulation_config'])
+        config.pop_size = population
+        return config
+
+    def genomes(self,population:int,hidden:int = 0):
+        random.seed(self.seed)
+        config  = self.neat_config(population)
+        genomes = list(neat.Population(config).population.items())
+        for _, genome in genomes:
+            for _ in range(hidden):
+                genome.mutate_add_node(config.genome_config)
+        return genomes, config
+
+    def measure(self,name:str,unit:str,better:str,sample,**info):
+        """
+        Runs `sample` `warmup` times unrecorded, then `repeats` times keeping the best value. How far the median
+        sample sits from it is stored as the benchmark's noise, so comparisons never flag less than that jitter.
+        """
+        samples = []
+        for repeat in range(self.warmup + self.repeats):
+            # Episodes print their progress, which is noise here, and collections land in random samples
+            gc.collect()
+            gc.disable()
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    value = sample()
+            finally:
+                gc.enable()
+            if repeat >= self.warmup:
+                samples.append(value)
+
+        # Interference only ever slows a sample down, so the fastest one is the closest to the real cost
+        best = max(samples) if better == HIGHER else min(samples)
+        self.results[name] = {
+            "value"   : best,
+            "noise"   : abs(statistics.median(samples) - best) / best if best else 0.0,
+            "unit"    : unit,
+            "better"  : better,
+            "samples" : samples,
+            **info,
+        }
+        print(f"{name:<28} {best:>12.4f} {unit}  (±{self.results[name]['noise']:.0%})")
+
+    def steps_per_sec(self,backend:str):
+        sim              = self.simulation(backend)
+        genomes, config  = self.genomes(self.config.getint('population', fallback=100))
+
+        def sample():
+            sim.metrics.reset()
+            start = time.perf_counter()
+            sim.evaluate(genomes, config, self.seed)
+            elapsed = time.perf_counter() - start
+            return sim.metrics.counts['steps'] / elapsed
+
+        self.measure(f"steps_per_sec.{backend}", 'steps/s', HIGHER, sample, population=len(genomes))
+
+    def terrain(self):
+        sim   = self.simulation('pymunk')
+        count = self.config.getint('terrains', fallback=20)
+
+        def sample():
+            start = time.perf_counter()
+            for seed in range(self.seed, self.seed + count):
+                sim.generate_terrain(seed)
+            return (time.perf_counter() - start) / count * 1e3
+
+        self.measure("terrain", 'ms', LOWER, sample)
+
+    def inference(self):
+        population = self.config.getint('inference_genomes', fallback=1000)
+        ticks      = self.config.getint('inference_ticks', fallback=50)
+        hidden     = [int(value) for value in self.config.get('inference_hidden', fallback='0').split(',')]
+
+        for nodes in hidden:
+            genomes, config = self.genomes(population, nodes)
+            inputs          = np.random.default_rng(self.seed).uniform(-1, 1, (ticks, population, config.genome_config.num_inputs))
+            rows            = inputs.tolist()
+
+            def batch():
+                network = BatchNetwork(genomes, config)
+                start   = time.perf_counter()
+                for tick in range(ticks):
+                    network.activate(inputs[tick])
+                return (time.perf_counter() - start) / ticks * 1e3
+
+            def subset():
+                # One lander retired, as every episode looks after its first touchdown
+                network = BatchNetwork(genomes, config)
+                active  = np.arange(1, population)
+                sensors = np.ascontiguousarray(inputs[:, active])
+                start   = time.perf_counter()
+                for tick in range(ticks):
+                    network.activate(sensors[tick], active)
+                return (time.perf_counter() - start) / ticks * 1e3
+
+            def per_genome():
+                networks = [neat.nn.FeedForwardNetwork.create(genome, config) for _, genome in genomes]
+                start    = time.perf_counter()
+                for tick in range(ticks):
+                    for network, row in zip(networks, rows[tick]):
+                        network.activate(row)
+                return (time.perf_counter() - start) / ticks * 1e3
+
+            self.measure(f"inference.batch.h{nodes}", 'ms/tick', LOWER, batch, genomes=population)
+            self.measure(f"inference.subset.h{nodes}", 'ms/tick', LOWER, subset, genomes=population - 1)
+            self.measure(f"inference.neat.h{nodes}", 'ms/tick', LOWER, per_genome, genomes=population)
+
+    def collision(self):
+        sim             = self.simulation('pymunk')
+        genomes, config = self.genomes(self.config.getint('population', fallback=100))
+        count           = self.config.getint('collisions', fallback=2000)
+
+        sim.generate_terrain(self.seed)
+        sim.spawn_landers(genomes, config, self.seed)
+        segment = sim.terrain["segments"][0]
+        # Stand-ins for the arbiters pymunk hands the pre_solve callback, one per lander
+        arbiters = [types.SimpleNamespace(shapes=(lander.shape, segment), total_impulse=pymunk.Vec2d(0, 0))
+                    for lander in sim.landers]
+
+        def sample():
+            start = time.perf_counter()
+            for index in range(count):
+                sim.handle_collision(arbiters[index % len(arbiters)], sim.space, None)
+                sim.landers[index % len(arbiters)].landed = False
+            return (time.perf_counter() - start) / count * 1e6
+
+        self.measure("collision", 'us/call', LOWER, sample, population=len(genomes))
+        sim.remove_landers()
+        sim.landers = []
+
+    def generation(self):
+        sim         = self.simulation('pymunk')
+        population  = self.config.getint('generation_population', fallback=50)
+        generations = self.config.getint('generations', fallback=2)
+
+        def sample():
+            random.seed(self.seed)
+            evolution = neat.Population(self.neat_config(population))
+            sim.generation = 0
+            start = time.perf_counter()
+            evolution.run(sim.simulation, generations)
+            return (time.perf_counter() - start) / generations
+
+        self.measure("generation", 's/gen', LOWER, sample, population=population, generations=generations)
+
+    def run(self,only:list[str] = None) -> dict:
+        benchmarks = {
+            "steps_per_sec.pymunk" : lambda: self.steps_per_sec('pymunk'),
+            "steps_per_sec.batch"  : lambda: self.steps_per_sec('batch'),
+            "terrain"              : self.terrain,
+            "inference"            : self.inference,
+            "collision"            : self.collision,
+            "generation"           : self.generation,
+        }
+        for name, benchmark in benchmarks.items():
+            if not only or any(name.startswith(prefix) or prefix.startswith(name) for prefix in only):
+                benchmark()
+        return self.results
+
+def machine() -> dict:
+    return {
+        "platform" : platform.platform(),
+        "python"   : platform.python_version(),
+        "cpus"     : os.cpu_count(),
+        "numpy"    : np.__version__,
+        "pymunk"   : pymunk.version,
+    }
+
+def threshold(thresholds:configparser.SectionProxy,name:str) -> float:
+    prefixes = [prefix for prefix in thresholds if prefix not in ('default', 'noise_factor') and name.startswith(prefix)]
+    return thresholds.getfloat(max(prefixes, key=len) if prefixes else 'default', fallback=0.25)
+
+def compare(results:dict,baseline:dict,thresholds:configparser.SectionProxy) -> tuple[list[str],list[str]]:
+    """
+    Prints every benchmark against its baseline. Returns the names that slowed down past their threshold, widened
+    to `noise_factor` times the noise the baseline recorded, and the names whose own noise is above what the
+    baseline was allowed, which are too noisy to judge either way.
+    """
+    noise_factor = thresholds.getfloat('noise_factor', fallback=2.0)
+    if baseline["machine"] != machine():
+        print("WARNING: the baseline was recorded on a different machine or library versions")
+
+    regressions, inconclusive = [], []
+    print(f"\n{'BENCHMARK':<28} {'BASELINE':>12} {'CURRENT':>12} {'CHANGE':>8}")
+    for name, result in results.items():
+        if name not in baseline["results"]:
+            print(f"{name:<28} {'-':>12} {result['value']:>12.4f}      new")
+            continue
+
+        before  = baseline["results"][name]["value"]
+        # Positive change is always a slowdown, whichever direction the benchmark prefers
+        change  = (before - result["value"]) / before if result["better"] == HIGHER else (result["value"] - before) / before
+        allowed = max(threshold(thresholds, name), noise_factor * baseline["results"][name].get("noise", 0.0))
+        flag    = ''
+        # A run noisier than the baseline allowed could hide a slowdown as large as its noise
+        if noise_factor * result.get("noise", 0.0) > allowed:
+            inconclusive.append(name)
+            flag = f"  INCONCLUSIVE (noise {result['noise']:.0%})"
+        elif change > allowed:
+            regressions.append(name)
+            flag = f"  REGRESSION (> {allowed:.0%})"
+        print(f"{name:<28} {before:>12.4f} {result['value']:>12.4f} {-change:>+8.1%}{flag}")
+    return regressions, inconclusive
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the simulation hot paths and compare them against a baseline")
+    parser.add_argument('-c', '--config', type=str, default="benchmarks/benchmarks.ini", help="Path to benchmark config")
+    parser.add_argument('-o', '--output', type=str, help="Write the results as JSON to this path")
+    parser.add_argument('-b', '--baseline', type=str, default="benchmarks/baseline.json", help="Baseline results to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline instead of comparing")
+    parser.add_argument('--only', type=str, nargs='*', help="Benchmark name prefixes to run, e.g. inference steps_per_sec.batch")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    config = configparser.ConfigParser()
+    config.read(args.config)
+
+    suite   = Suite(config['BENCHMARKS'])
+    results = {
+        "machine" : machine(),
+        "date"    : time.strftime('%Y-%m-%d %H:%M:%S'),
+        "results" : suite.run(args.only),
+    }
+
+    status = 0
+    if args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(results, file, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions, inconclusive = compare(results["results"], baseline, config['THRESHOLDS'])
+
+        # Too noisy to judge is rerun, never passed
+        for _ in range(config['BENCHMARKS'].getint('reruns', fallback=2)):
+            if not inconclusive:
+                break
+            print(f"\nRerunning {', '.join(inconclusive)}, too noisy to compare")
+            suite.run(inconclusive)
+            regressions, inconclusive = compare(results["results"], baseline, config['THRESHOLDS'])
+
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            status = 1
+        elif inconclusive:
+            print(f"\n{len(inconclusive)} inconclusive: {', '.join(inconclusive)}, rerun on a quieter machine")
+            status = 2
+    else:
+        print(f"No baseline at {args.baseline}, run with --save-baseline to store one")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    sys.exit(status)
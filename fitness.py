@@ -0,0 +1,100 @@
+import numpy as np
+
+AGGREGATES = ('mean', 'worst', 'quantile')
+
+def fitness_kernel(distance:np.ndarray,velocity:np.ndarray,landed:np.ndarray) -> np.ndarray:
+    """
+    Lander fitness from final distance to surface, speed and touchdown flag. It is a negated cost, 0 at best,
+    because neat-python always breeds and keeps the highest fitness whatever fitness_criterion says.
+    """
+    cost = 500 * (1 - np.exp(-0.01 * np.sqrt(np.square(distance) + np.square(velocity))))
+    return -(cost + 2000 * ~np.asarray(landed, dtype=bool))
+
+class StreamingQuantile:
+    """ P-square quantile estimate per column, five markers each, however many values are streamed in. """
+
+    def __init__(self,count:int,quantile:float):
+        self.quantile = quantile
+        self.seen     = 0
+        self.first    = np.zeros((count, 5))
+        self.heights  = np.zeros((count, 5))
+        self.markers  = np.tile(np.arange(5, dtype=float), (count, 1))
+        self.desired  = np.tile(np.array([0, 2 * quantile, 4 * quantile, 2 + 2 * quantile, 4]), (count, 1))
+        self.steps    = np.array([0, quantile / 2, quantile, (1 + quantile) / 2, 1])
+
+    def update(self,values:np.ndarray):
+        if self.seen < 5:
+            self.first[:, self.seen] = values
+            self.seen += 1
+            if self.seen == 5:
+                self.heights = np.sort(self.first, axis=1)
+            return
+
+        self.seen += 1
+        rows = np.arange(len(values))
+        q, n = self.heights, self.markers
+
+        q[:, 0] = np.minimum(q[:, 0], values)
+        q[:, 4] = np.maximum(q[:, 4], values)
+        cell = np.clip((values[:, None] >= q[:, 1:4]).sum(axis=1), 0, 3)
+
+        n[:, 1:] += np.arange(1, 5)[None, :] > cell[:, None]
+        self.desired += self.steps
+
+        for i in (1, 2, 3):
+            offset = self.desired[:, i] - n[:, i]
+            move   = ((offset >= 1) & (n[:, i + 1] - n[:, i] > 1)) | ((offset <= -1) & (n[:, i - 1] - n[:, i] < -1))
+            if not move.any():
+                continue
+
+            d = np.sign(offset[move])
+            r = rows[move]
+
+            parabolic = q[r, i] + d / (n[r, i + 1] - n[r, i - 1]) * (
+                (n[r, i] - n[r, i - 1] + d) * (q[r, i + 1] - q[r, i]) / (n[r, i + 1] - n[r, i]) +
+                (n[r, i + 1] - n[r, i] - d) * (q[r, i] - q[r, i - 1]) / (n[r, i] - n[r, i - 1]))
+
+            neighbour = np.where(d > 0, i + 1, i - 1)
+            linear    = q[r, i] + d * (q[r, neighbour] - q[r, i]) / (n[r, neighbour] - n[r, i])
+
+            q[r, i]  = np.where((q[r, i - 1] < parabolic) & (parabolic < q[r, i + 1]), parabolic, linear)
+            n[r, i] += d
+
+    def result(self) -> np.ndarray:
+        if self.seen < 5:
+            return np.quantile(self.first[:, :self.seen], self.quantile, axis=1)
+        return self.heights[:, 2].copy()
+
+class FitnessAggregate:
+    """ Combines one fitness value per genome per episode into a single score, in constant memory. """
+
+    def __init__(self,ids:list[int],method:str = 'mean',quantile:float = 0.9):
+        if method not in AGGREGATES:
+            raise ValueError(f"Unknown fitness aggregate: {method}")
+
+        self.ids    = list(ids)
+        self.method = method
+        self.count  = 0
+        self.total  = np.zeros(len(self.ids))
+        self.worst  = np.full(len(self.ids), np.inf)
+        self.stream = StreamingQuantile(len(self.ids), quantile) if method == 'quantile' else None
+
+    def update(self,results:dict[int,float]):
+        values = np.array([results[genome_id] for genome_id in self.ids], dtype=float)
+
+        self.count += 1
+        if self.method == 'mean':
+            self.total += values
+        elif self.method == 'worst':
+            self.worst = np.minimum(self.worst, values)
+        else:
+            self.stream.update(values)
+
+    def result(self) -> dict[int,float]:
+        if self.method == 'mean':
+            values = self.total / max(self.count, 1)
+        elif self.method == 'worst':
+            values = self.worst
+        else:
+            values = self.stream.result()
+        return dict(zip(self.ids, values.tolist()))
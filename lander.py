@@ -4,90 +4,160 @@ import pymunk
 import pygame
 import random
 
+from sprites import sprite_atlas
+
+LANDER_SIZE     = (50,50)
+LANDER_VERTICES = [(-LANDER_SIZE[0]/2+5,-LANDER_SIZE[1]/2+5), (LANDER_SIZE[0]/2-5,-LANDER_SIZE[1]/2+5),
+                   (LANDER_SIZE[0]/2,LANDER_SIZE[1]/2), (-LANDER_SIZE[0]/2,LANDER_SIZE[1]/2)]
+ENGINE_POINTS   = ((-10,50),(10,50))
+MAX_ANGULAR_VEL = 30.0
+
+def spawn_state(rng:random.Random,config,width:int):
+    max_init_velocity = int(config['SIMULATION']['max_init_velocity'])
+    max_init_angle    = int(config['SIMULATION']['max_init_angle_deg'])
+
+    position = (rng.randint(100,width-100),int(config['SIMULATION']['spawn_height']))
+    velocity = [rng.randint(-max_init_velocity,max_init_velocity),rng.randint(0,max_init_velocity)]
+    angle    = math.radians(rng.randint(-max_init_angle,max_init_angle))
+
+    return position,velocity,angle
+
+TEXTURES = ('texture_default', 'texture_left_engine', 'texture_right_engine', 'texture_both_engine')
+
+class LanderSpec:
+    """ The lander config parsed once into typed values, shared by every lander built from it. """
+
+    __slots__ = ('dry_weight', 'fuel_level', 'fuel_consume_rate', 'engine_force', 'max_land_vel', 'max_init_velocity',
+                 'timestep', 'category', 'debug', 'textures', 'sprite_angle_step', 'sprite_cache_size')
+
+    def __init__(self,config):
+        self.dry_weight        = int(config['LANDER']['dry_weight'])
+        self.fuel_level        = int(config['LANDER']['fuel_level'])
+        self.fuel_consume_rate = float(config['LANDER'].get('fuel_consume_rate', fallback=0))
+        self.engine_force      = int(config['LANDER']['max_engine_power'])
+        self.max_land_vel      = int(config['LANDER']['max_land_vel'])
+        self.max_init_velocity = int(config['SIMULATION']['max_init_velocity'])
+        self.timestep          = float(config['SIMULATION']['timestep'])
+        self.category          = int(config['SIMULATION']['category'])
+        self.debug             = config['SIMULATION'].getboolean('debug', fallback=False)
+        self.textures          = {name: config['LANDER'][name] for name in TEXTURES}
+        self.sprite_angle_step = config['LANDER'].getfloat('sprite_angle_step', fallback=2.0)
+        self.sprite_cache_size = config['LANDER'].getint('sprite_cache_size', fallback=1024)
+
 class TwinFlameCan:
+    # Slots instead of an instance __dict__: large populations hold thousands of these
+    __slots__ = ('space', 'screen', 'config', 'spec', 'terrain', 'nn_data', 'debug', 'rng', 'body', 'shape', 'sprites',
+                 'lander_texture', 'fuel', 'throttle_l', 'throttle_r', 'land_velocity', 'position', 'current_pos',
+                 'angle', 'sin_angle', 'cos_angle', 'angular_vel', 'vel_x', 'vel_y', 'zone_dist_l', 'zone_dist_r',
+                 'current_segment', 'slope', 'distance_to_surface', 'alive', 'landed', 'cause_of_death')
+
+    w, h = LANDER_SIZE
+
     def __init__(self,
                  screen:pygame.Surface,
                  space:pymunk.Space,
                  terrain,
                  nn_data,
-                 config):
+                 config,
+                 seed = None,
+                 spec:LanderSpec = None):
         
-        self.space   = space
-        self.screen  = screen
-        self.config  = config
-        self.terrain = terrain
+        self.space    = space
+        self.screen   = screen
+        self.config   = config
+        self.spec     = spec or LanderSpec(config)
+        self.terrain  = terrain
+        self.debug    = self.spec.debug
+        self.body     = pymunk.Body()
+
+        self.shape = pymunk.Poly(self.body, LANDER_VERTICES)
+        self.shape.friction = 1
+        self.shape.collision_type = self.spec.category
+
+        self.sprites = sprite_atlas(self.spec.sprite_angle_step, self.spec.sprite_cache_size)
+
+        self.reset(nn_data, seed)
+
+    def reset(self,nn_data,seed = None):
+        """ Respawns the lander for a new genome, reusing its body, shape and textures. """
         self.nn_data = nn_data
-        self.body    = pymunk.Body()
-        self.body.position = (random.randint(100,self.screen.get_width()-100),int(self.config['SIMULATION']['spawn_height']))
+        self.rng     = random.Random(seed)
 
-        self.dry_weight = int(self.config['LANDER']['dry_weight'])
-        self.fuel_level = int(self.config['LANDER']['fuel_level'])
+        position,velocity,angle = spawn_state(self.rng,self.config,self.screen.get_width())
 
-        self.w, self.h = 50, 50
-        vs   = [(-self.w/2+5,-self.h/2+5), (self.w/2-5,-self.h/2+5), (self.w/2,self.h/2), (-self.w/2,self.h/2)]
-        
-        self.shape = pymunk.Poly(self.body, vs)
-        self.shape.friction = 1
-        self.shape.collision_type = int(self.config['SIMULATION']['category'])
-        self.shape.mass = self.dry_weight + self.fuel_level
-        
-        self.space.add(self.body)
-        self.space.add(self.shape)
+        self.fuel       = float(self.spec.fuel_level)
+        self.shape.mass = self.spec.dry_weight + self.spec.fuel_level
+
+        # A zero-length integration clears the contact bias velocity a reused body kept from its last episode
+        pymunk.Body.update_position(self.body, 0.0)
 
-        self.texture_default      = pygame.image.load(self.config['LANDER']['texture_default']).convert_alpha()
-        self.texture_left_engine  = pygame.image.load(self.config['LANDER']['texture_left_engine']).convert_alpha()
-        self.texture_right_engine = pygame.image.load(self.config['LANDER']['texture_right_engine']).convert_alpha()
-        self.texture_both_engine  = pygame.image.load(self.config['LANDER']['texture_both_engine']).convert_alpha()
+        self.body.position         = position
+        self.body.velocity         = velocity
+        self.body.angle            = angle
+        self.body.angular_velocity = 0.0
+        self.body.force            = (0, 0)
+        self.body.torque           = 0.0
 
-        self.lander_texture = self.texture_default
+        if not self.body.space:
+            self.space.add(self.body, self.shape)
 
-        self.max_init_velocity = int(self.config['SIMULATION']['max_init_velocity'])
-        self.max_init_angle    = int(self.config['SIMULATION']['max_init_angle_deg'])
+        self.lander_texture = self.sprites.texture(self.spec.textures['texture_default'])
 
-        self.body.velocity = [random.randint(-self.max_init_velocity,self.max_init_velocity),random.randint(0,self.max_init_velocity)]
-        self.body.angle    = math.radians(random.randint(-self.max_init_angle,self.max_init_angle))
+        self.throttle_l    = 0.0
+        self.throttle_r    = 0.0
 
-        self.engine_force  = int(self.config['LANDER']['max_engine_power'])
+        self.land_velocity = self.spec.max_init_velocity
 
-        self.land_velocity = self.max_init_velocity
+        self.position            = self.body.position
+        self.angle               = self.body.angle
+        self.vel_x, self.vel_y   = self.body.velocity
+        self.distance_to_surface = 0.0
 
         self.alive  = True
         self.landed = False
         
         self.cause_of_death = "NA"
-    
+
     def is_alive(self):
         return self.alive
 
     def kill(self,msg):
-        try:
-            self.space.remove(self.shape)
-            self.space.remove(self.body)
-        except Exception as e:
-            print(e)
+        if self.body.space:
+            self.space.remove(self.shape, self.body)
 
         self.alive = False
         self.cause_of_death = msg
-    
-    def find_slope_and_y(self,x,current_segment):
-        x1 , y1 = current_segment[0]
-        x2 , y2 = current_segment[1]
-        slope = (y2 - y1) / (x2 - x1)
 
-        y = y1 + slope * (x- x1)
-        pygame.draw.circle(self.screen,'red',(x,y),4)        
+    def touch_down(self,velocity):
+        # Touchdown resolved analytically, the rest of the fall is not simulated
+        if self.body.space:
+            self.space.remove(self.shape, self.body)
+
+        self.land_velocity       = velocity
+        self.distance_to_surface = 0.0
+        self.landed              = True
+    
+    def find_slope_and_y(self,x,segment_index):
+        slope,y = self.terrain['query'].slope_and_height(segment_index,x)
+        if self.debug:
+            pygame.draw.circle(self.screen,'red',(x,y),4)
         return slope,y
     
     def set_collided(self,impulse):
         if not self.landed:
             self.land_velocity = abs(self.body.velocity)
             self.landed  = True
+            # Retired like touch_down, a landed body would otherwise keep colliding every substep;
+            # pymunk defers removals made inside a collision callback until the step ends
+            if self.body.space:
+                self.space.remove(self.shape, self.body)
 
     def update(self):
         if not self.alive: 
             return
 
-        self.current_pos = int(self.body.position.x), int(self.body.position.y)       
+        self.position    = self.body.position
+        self.current_pos = int(self.position.x), int(self.position.y)
         self.angle       = self.body.angle 
         self.sin_angle   = math.sin(self.angle)
         self.cos_angle   = math.cos(self.angle)
@@ -98,36 +168,75 @@ class TwinFlameCan:
         self.zone_dist_l = self.current_pos[0]
         self.zone_dist_r = self.screen.get_width() - self.current_pos[0] 
 
-        if self.angular_vel > 30.0:
+        if self.angular_vel > MAX_ANGULAR_VEL:
             self.kill("ang vel exceed")
             return
         
-        self.current_segment = None
-        for seg in self.terrain['segment_coords']:
-            if seg[1][0] > self.current_pos[0] and self.current_pos[0] > 0:
-                self.current_segment = seg
-                pygame.draw.line(self.screen,'green',seg[0],seg[1],10)
-                break
-
-        if self.current_segment is None:
+        segment_index = self.terrain['query'].segment_index(self.current_pos[0])
+        if segment_index is None:
             self.kill("escaped the universe")
             return
+
+        self.current_segment = self.terrain['segment_coords'][segment_index]
+        if self.debug:
+            pygame.draw.line(self.screen,'green',self.current_segment[0],self.current_segment[1],10)
         
         if self.landed:
-            if self.land_velocity > int(self.config['LANDER']['max_land_vel']):
+            if self.land_velocity > self.spec.max_land_vel:
                 self.kill("landed in too hot")
                 return
-            
+            # Freeze the scored state at touchdown so fitness doesn't depend on how long the episode runs
+            return
+
         x = self.current_pos[0]
-        self.slope,y = self.find_slope_and_y(x,self.current_segment)
+        self.slope,y = self.find_slope_and_y(x,segment_index)
         self.distance_to_surface =  y - self.current_pos[1] - self.h/2
 
+    def sensors(self):
+        return [self.distance_to_surface, self.vel_x, self.vel_y, self.angle, self.angular_vel, self.fuel]
 
+    def think(self):
+        output_l, output_r = self.nn_data["network"].activate(self.sensors())
+        self.set_throttle(output_l, output_r)
 
-        self.body.apply_force_at_local_point((0,-0),(-10,50))
-        self.body.apply_force_at_local_point((0,-0),(10,50))
+    def set_throttle(self,output_l,output_r):
+        self.throttle_l = min(1.0, max(0.0, (output_l + 1) / 2))
+        self.throttle_r = min(1.0, max(0.0, (output_r + 1) / 2))
+
+    def apply_thrust(self):
+        if self.fuel <= 0:
+            self.throttle_l = self.throttle_r = 0.0
+
+        self.body.apply_force_at_local_point((0,-self.spec.engine_force * self.throttle_l),ENGINE_POINTS[0])
+        self.body.apply_force_at_local_point((0,-self.spec.engine_force * self.throttle_r),ENGINE_POINTS[1])
+
+        burned = (self.throttle_l + self.throttle_r) * self.spec.fuel_consume_rate * self.spec.timestep
+        if burned > 0:
+            self.fuel       = max(0.0, self.fuel - burned)
+            self.shape.mass = self.spec.dry_weight + self.fuel
+
+    def evaluate_lander(self):
+        velocity = self.land_velocity if self.landed else math.hypot(self.vel_x, self.vel_y)
+        fitness  = 500 * (1 - math.exp(-0.01 * math.sqrt(self.distance_to_surface**2 + velocity**2)))
+        if not self.landed:
+            fitness += 2000
+
+        return [self.distance_to_surface, velocity, fitness]
 
-        
     def draw(self):
         if not self.alive: return
-        pass
\ No newline at end of file
+
+        left, right = self.throttle_l > 0.1, self.throttle_r > 0.1
+        if left and right:
+            texture = 'texture_both_engine'
+        elif left:
+            texture = 'texture_left_engine'
+        elif right:
+            texture = 'texture_right_engine'
+        else:
+            texture = 'texture_default'
+
+        path  = self.spec.textures[texture]
+        frame = self.sprites.rotated(path, math.degrees(self.body.angle))
+        self.lander_texture = self.sprites.texture(path)
+        return self.screen.blit(frame, frame.get_rect(center=self.body.position))
\ No newline at end of file
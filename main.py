@@ -7,12 +7,20 @@ if __name__ == '__main__':
     parser.add_argument('-cs', '--config_simulation', type=str, default="configs/simulation.ini", help="Path to simulation config")
     parser.add_argument('-cl', '--config_lander', type=str, default="configs/lander.ini", help="Path to lander config")
     parser.add_argument('-ct', '--config_terrain', type=str, default="configs/terrain.ini", help="Path to terrain config")
+    parser.add_argument('-hl', '--headless', action='store_true', help="Train without rendering or frame pacing")
+    parser.add_argument('-w', '--workers', type=int, default=1, help="Number of worker processes evaluating genomes in parallel")
+    parser.add_argument('-b', '--backend', type=str, choices=['pymunk', 'batch'], default=None, help="Physics backend, overrides the simulation config")
+    parser.add_argument('-s', '--seed', type=int, default=None, help="Run seed, overrides the simulation config; the same seed and configs reproduce a run")
     
     args = parser.parse_args()
     sim = GeneticSimulation(
         simulation_config_file=args.config_simulation,
         lander_config_file=args.config_lander,
         terrain_config_file=args.config_terrain,
+        headless=args.headless,
+        workers=args.workers,
+        backend=args.backend,
+        seed=args.seed,
     )
 
     sim.run()
\ No newline at end of file
@@ -1,46 +1,339 @@
 import argparse
-import pandas as pd
+import glob
+import json
+import numpy as np
 import plotille
 import os
+import threading
 import time
 
-def plot_csv(df, fitness_only):
+from concurrent.futures import ThreadPoolExecutor,wait
+
+from profiling import PHASES
+
+class FitnessTail:
+    """ Follows a growing fitness CSV from the last byte read, parsing only appended rows into preallocated arrays. """
+
+    def __init__(self, csv_file_path, capacity=1024):
+        self.path     = csv_file_path
+        self.capacity = capacity
+        self.offset   = 0
+        self.partial  = b''
+        self.stamp    = None
+        self.columns  = None
+        self.data     = None
+        self.count    = 0
+
+    def reset(self):
+        self.offset  = 0
+        self.partial = b''
+        self.columns = None
+        self.data    = None
+        self.count   = 0
+
+    def read_lines(self):
+        """ Complete lines appended since the last call; a half-written last line waits for its newline. """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+
+        stamp = (stat.st_size, stat.st_mtime_ns)
+        if stamp == self.stamp:
+            return []
+
+        # A shorter file was truncated or replaced, start over from its beginning
+        if stat.st_size < self.offset:
+            self.reset()
+
+        with open(self.path, 'rb') as file:
+            file.seek(self.offset)
+            chunk = file.read()
+        self.offset += len(chunk)
+        self.stamp   = stamp
+
+        lines = (self.partial + chunk).split(b'\n')
+        self.partial = lines.pop()
+        return [line.strip() for line in lines if line.strip()]
+
+    def parse(self, line):
+        """ One row of floats, or None for the header line that names the columns. """
+        fields = line.decode().split(',')
+        if self.columns is None:
+            self.columns = {name: index for index, name in enumerate(fields)}
+            self.data    = np.empty((self.capacity, len(fields)))
+            return None
+        if len(fields) != len(self.columns):
+            raise ValueError(f"expected {len(self.columns)} fields, got {len(fields)}")
+        return [float(field) for field in fields]
+
+    def poll(self):
+        """ Reads whatever was appended since the last call, returns True when new rows arrived. """
+        rows = []
+        for line in self.read_lines():
+            # The offset is already past this line, so a bad one is skipped instead of losing the rows around it
+            try:
+                row = self.parse(line)
+            except (ValueError, KeyError, TypeError) as error:
+                print(f"Skipping malformed line in {self.path}: {line[:80]!r} ({error})")
+                continue
+            if row is not None:
+                rows.append(row)
+
+        self.append(rows)
+        return bool(rows)
+
+    def append(self, rows):
+        if not rows:
+            return
+
+        needed = self.count + len(rows)
+        if needed > len(self.data):
+            # Doubling keeps appends amortized O(1) however long the run gets
+            grown = np.empty((max(needed, 2 * len(self.data)), self.data.shape[1]))
+            grown[:self.count] = self.data[:self.count]
+            self.data = grown
+
+        self.data[self.count:needed] = rows
+        self.count = needed
+
+    def __getitem__(self, name):
+        return self.data[:self.count, self.columns[name]]
+
+class MetricsTail(FitnessTail):
+    """ Follows a run's metrics.jsonl, flattening each generation's phases and counts into columns. """
+
+    def parse(self, line):
+        record = json.loads(line)
+        fields = {"Run": record["generation"], "wall": record["wall"], **record["phases"], **record["counts"]}
+        if self.columns is None:
+            self.columns = {name: index for index, name in enumerate(fields)}
+            self.data    = np.empty((self.capacity, len(fields)))
+        return [float(fields.get(name, 0.0)) for name in self.columns]
+
+def plot_metrics(tail):
+    """ Seconds spent per phase in each generation, phases that never took time are left out. """
+    phases = [name for name in tail.columns if name not in ('Run', 'wall') and name in PHASES and tail[name].any()]
+
+    fig = plotille.Figure()
+    fig.width = 60
+    fig.height = 20
+    fig.color_mode = 'byte'
+    fig.set_x_limits(min_=int(tail['Run'].min()), max_=int(tail['Run'].max()) + 1)
+    fig.set_y_limits(min_=0, max_=max(float(tail['wall'].max()), 1e-3))
+
+    fig.plot(tail['Run'], tail['wall'], lc=255, label='wall')
+    for index, name in enumerate(phases):
+        fig.plot(tail['Run'], tail[name], lc=(index * 37 + 100) % 256, label=name)
+
+    print('\033[H\033[J', end='')
+    print(fig.show(legend=True))
+    last = {name: float(tail[name][-1]) for name in tail.columns}
+    print(" | ".join(f"{name}: {value:.3f}" for name, value in last.items()))
+
+def plot_csv(tail, fitness_only, max_points=200):
     fig = plotille.Figure()
     fig.width = 40
     fig.height = 20
-    fig.set_x_limits(min_=int(df['Run'].min()), max_=int(df['Run'].max()))
-    
-    if fitness_only:
-        y_min = df['Avg Fitness'].min()
-        y_max = df['Avg Fitness'].max()
-    else:
-        y_min = min(df['Avg Dist'].min(), df['Avg Speed'].min(), df['Avg Fitness'].min())
-        y_max = max(df['Avg Dist'].max(), df['Avg Speed'].max(), df['Avg Fitness'].max())
-    
-    fig.set_y_limits(min_=y_min, max_=y_max)
+    fig.set_x_limits(min_=int(tail['Run'].min()), max_=int(tail['Run'].max()))
+
+    # test.py runs write distance and speed, main.py runs write best fitness instead
+    columns = ['Avg Fitness'] if fitness_only else [name for name in ('Avg Dist', 'Avg Speed', 'Best Fitness', 'Avg Fitness')
+                                                    if name in tail.columns]
+    # Bucketed like the dashboard, so redraws stay cheap however many generations the run has
+    series  = {name: downsample(tail['Run'], tail[name], max_points) for name in columns}
+
+    y_min = min(y.min() for _, y in series.values())
+    y_max = max(y.max() for _, y in series.values())
+
+    fig.set_y_limits(min_=y_min, max_=max(y_max, y_min + 1e-9))
     fig.color_mode = 'byte'
 
-    if fitness_only:
-        fig.plot(df['Run'], df['Avg Fitness'], lc=200, label='Avg Fitness')
-    else:
-        fig.plot(df['Run'], df['Avg Dist'], lc=100, label='Avg Dist')
-        fig.plot(df['Run'], df['Avg Speed'], lc=150, label='Avg Speed')
-        fig.plot(df['Run'], df['Avg Fitness'], lc=200, label='Avg Fitness')
-    
-    os.system('clear')  # Clear the terminal screen
+    colors = {'Avg Dist': 100, 'Avg Speed': 150, 'Best Fitness': 50, 'Avg Fitness': 200}
+    for name, (x, y) in series.items():
+        fig.plot(x, y, lc=colors[name], label=name)
+
+    print('\033[H\033[J', end='')  # Clear the terminal screen without spawning a shell
     print(fig.show(legend=True))
 
+def downsample(x, y, max_points=200):
+    """ Averages a long series into at most max_points buckets, keeping the newest point exact. """
+    if len(x) <= max_points:
+        return x, y
+    starts = np.linspace(0, len(x) - 1, max_points, dtype=int)
+    starts = np.unique(starts)
+    counts = np.diff(np.append(starts, len(x)))
+    x_mean = np.add.reduceat(x, starts) / counts
+    y_mean = np.add.reduceat(y, starts) / counts
+    x_mean[-1], y_mean[-1] = x[-1], y[-1]
+    return x_mean, y_mean
+
+def discover_runs(runs_folder):
+    return sorted(glob.glob(os.path.join(runs_folder, '*', 'fitness_data.csv')))
+
+class RunDashboard:
+    """ Tails the fitness file of every run under `runs_folder` from a thread pool, within a time budget per refresh. """
+
+    def __init__(self, runs_folder, threads=8, budget=0.5, max_points=200):
+        self.runs_folder = runs_folder
+        self.budget      = budget
+        self.max_points  = max_points
+        self.pool        = ThreadPoolExecutor(threads)
+        self.tails       = {}
+        self.pending     = {}
+        self.summaries   = {}
+
+    def discover(self):
+        for path in discover_runs(self.runs_folder):
+            if path not in self.tails:
+                self.tails[path] = FitnessTail(path)
+
+    def refresh(self):
+        """ Polls every idle run concurrently; polls still running when the budget ends are collected next refresh. """
+        self.discover()
+        changed = self.collect()
+
+        for path, tail in self.tails.items():
+            if path not in self.pending:
+                self.pending[path] = self.pool.submit(tail.poll)
+
+        wait(list(self.pending.values()), timeout=self.budget)
+        return self.collect() or changed
+
+    def collect(self):
+        """ Summarizes every run whose poll finished; a failed poll is logged and that run keeps its last summary. """
+        changed = False
+        for path in [path for path, future in self.pending.items() if future.done()]:
+            future = self.pending.pop(path)
+            try:
+                if future.result():
+                    self.summaries[path] = self.summarize(path, self.tails[path])
+                    changed = True
+            except Exception as error:
+                print(f"Polling {path} failed: {error!r}")
+        return changed
+
+    def summarize(self, path, tail):
+        generations = tail['Run']
+        series      = {}
+        for column in ('Avg Fitness', 'Best Fitness'):
+            if column in tail.columns:
+                x, y = downsample(generations, tail[column], self.max_points)
+                series[column] = {"x": x.tolist(), "y": y.tolist()}
+
+        # Fitness is maximised, so a run's best is the highest average it reached
+        return {
+            "name"        : os.path.basename(os.path.dirname(path)),
+            "generations" : int(generations[-1]),
+            "last"        : float(tail['Avg Fitness'][-1]),
+            "best"        : float(tail['Avg Fitness'].max()),
+            "series"      : series,
+        }
+
+    def summary(self):
+        # Summaries are only rebuilt once a poll finished, so a run still being polled shows its last good one
+        return sorted(self.summaries.values(), key=lambda run: run["best"], reverse=True)
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+def plot_runs(runs, top=8):
+    """ Overlays the average fitness of the `top` best runs and lists every run below. """
+    fig = plotille.Figure()
+    fig.width = 60
+    fig.height = 20
+    fig.color_mode = 'byte'
+
+    shown = runs[:top]
+    xs = [value for run in shown for value in run["series"]["Avg Fitness"]["x"]]
+    ys = [value for run in shown for value in run["series"]["Avg Fitness"]["y"]]
+    fig.set_x_limits(min_=min(xs), max_=max(max(xs), min(xs) + 1))
+    fig.set_y_limits(min_=min(ys), max_=max(max(ys), min(ys) + 1))
+
+    for index, run in enumerate(shown):
+        series = run["series"]["Avg Fitness"]
+        fig.plot(series["x"], series["y"], lc=(index * 37 + 100) % 256, label=run["name"])
+
+    print('\033[H\033[J', end='')
+    print(fig.show(legend=True))
+    print(f"{'RUN':<40} {'GEN':>6} {'LAST':>12} {'BEST':>12}")
+    for run in runs:
+        print(f"{run['name'][:40]:<40} {run['generations']:>6} {run['last']:>12.3f} {run['best']:>12.3f}")
+
+def live_dashboard(runs_folder, interval=15.0, threads=8, budget=0.5, top=8):
+    dashboard = RunDashboard(runs_folder, threads, budget)
+    try:
+        while True:
+            if dashboard.refresh():
+                runs = dashboard.summary()
+                if runs:
+                    plot_runs(runs, top)
+            time.sleep(interval)
+    finally:
+        dashboard.close()
+
+def serve_dashboard(runs_folder, port=5000, interval=15.0, threads=8, budget=0.5):
+    """ Serves view_run.html and the run summaries as JSON; Flask is only needed for this mode. """
+    from flask import Flask,send_file
+
+    dashboard = RunDashboard(runs_folder, threads, budget)
+    summary   = {"runs": []}
+
+    def refresh_forever():
+        while True:
+            dashboard.refresh()
+            summary["runs"] = dashboard.summary()
+            time.sleep(interval)
+
+    threading.Thread(target=refresh_forever, daemon=True).start()
+
+    app = Flask(__name__)
+
+    @app.route('/')
+    def index():
+        return send_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'view_run.html'))
+
+    @app.route('/api/runs')
+    def runs():
+        return app.response_class(json.dumps(summary["runs"]), mimetype='application/json')
+
+    app.run(port=port)
+
 def live_plot(csv_file_path, interval=15.0, fitness_only=False):
+    tail = FitnessTail(csv_file_path)
     while True:
-        df = pd.read_csv(csv_file_path)
-        plot_csv(df, fitness_only)
+        # Only the appended bytes are parsed, and the plot is redrawn only when rows arrived
+        if tail.poll():
+            plot_csv(tail, fitness_only)
         time.sleep(interval)  # Wait for the specified interval before updating the plot
 
+def live_metrics(metrics_file_path, interval=15.0):
+    tail = MetricsTail(metrics_file_path)
+    while True:
+        if tail.poll():
+            plot_metrics(tail)
+        time.sleep(interval)
+
 if __name__ == '__main__':
-    parser = argparse.ArgumentParser(description="Script to plot data from a run fitness file")
-    parser.add_argument('csv_file', type=str, help="Path to the CSV file")
+    parser = argparse.ArgumentParser(description="Script to plot data from a run fitness file, or every run in a folder")
+    parser.add_argument('csv_file', type=str, nargs='?', help="Path to the CSV file")
     parser.add_argument('--interval', type=float, default=15.0, help="Time interval between updates in seconds")
     parser.add_argument('--fitness-only', action='store_true', help="Plot only Avg Fitness data")
+    parser.add_argument('--runs', type=str, help="Folder of run folders to compare, e.g. runs/")
+    parser.add_argument('--threads', type=int, default=8, help="Threads tailing run files concurrently")
+    parser.add_argument('--budget', type=float, default=0.5, help="Seconds a refresh may spend reading run files")
+    parser.add_argument('--top', type=int, default=8, help="Runs drawn in the terminal plot")
+    parser.add_argument('--serve', type=int, metavar='PORT', help="Serve the dashboard on localhost:PORT instead of the terminal")
+    parser.add_argument('--metrics', type=str, help="Path to a run's metrics.jsonl, plots time spent per phase")
     args = parser.parse_args()
-    
-    live_plot(args.csv_file, args.interval, args.fitness_only)
+
+    if args.metrics:
+        live_metrics(args.metrics, args.interval)
+    elif args.runs and args.serve:
+        serve_dashboard(args.runs, args.serve, args.interval, args.threads, args.budget)
+    elif args.runs:
+        live_dashboard(args.runs, args.interval, args.threads, args.budget, args.top)
+    elif args.csv_file:
+        live_plot(args.csv_file, args.interval, args.fitness_only)
+    else:
+        parser.error("either a csv_file or --runs is required")
@@ -0,0 +1,81 @@
+from collections import deque
+
+import numpy as np
+import pygame
+
+class ParticleSystem:
+    """ Smoke particles for a whole scene in a fixed-capacity NumPy ring buffer, updated and drawn in one pass. """
+
+    def __init__(self,
+                 screen   : pygame.Surface,
+                 capacity : int   = 4096,
+                 lifetime : float = 1.0,
+                 speed    : float = 40.0,
+                 color    : tuple[int,int,int] = (170,170,170),
+                 sprites  : int   = 8,
+                 seed     : int   = None):
+
+        self.screen   = screen
+        self.capacity = capacity
+        self.lifetime = lifetime
+        self.speed    = speed
+        self.rng      = np.random.default_rng(seed)
+
+        self.position = np.zeros((capacity, 2))
+        self.velocity = np.zeros((capacity, 2))
+        self.age      = np.full(capacity, np.inf)
+        self.head     = 0
+        # Only the newest `capacity` emissions can survive a flush, older ones are dropped while they wait
+        self.pending  = deque(maxlen=capacity)
+
+        # Particles grow and fade with age, drawn from one pre-rendered puff per age bucket
+        self.sprites = []
+        for bucket in range(sprites):
+            radius = 2 + 2 * bucket
+            puff   = pygame.Surface((2 * radius, 2 * radius), pygame.SRCALPHA)
+            pygame.draw.circle(puff, (*color, int(200 * (1 - bucket / sprites))), (radius, radius), radius)
+            self.sprites.append((puff, radius))
+
+    def emit(self,position,count:int = 1):
+        self.pending.extend([tuple(position)] * min(count, self.capacity))
+
+    def flush(self):
+        if not self.pending:
+            return
+
+        origins = np.array(self.pending, dtype=float)
+        self.pending.clear()
+
+        slots = (self.head + np.arange(len(origins))) % self.capacity
+        self.head = int((self.head + len(origins)) % self.capacity)
+
+        spread = self.rng.uniform(-0.5, 0.5, len(origins))
+        speed  = self.speed * self.rng.uniform(0.5, 1.0, len(origins))
+
+        self.position[slots] = origins
+        self.velocity[slots] = np.column_stack((speed * np.sin(spread), speed * np.cos(spread)))
+        self.age[slots]      = 0.0
+
+    def update(self,dt:float):
+        self.flush()
+
+        alive = self.age < self.lifetime
+        self.position[alive] += self.velocity[alive] * dt
+        self.velocity[alive] *= 1 - min(1.0, 2.0 * dt)
+        self.age[alive]      += dt
+
+    def alive(self) -> int:
+        return int(np.count_nonzero(self.age < self.lifetime))
+
+    def draw(self):
+        alive = np.flatnonzero(self.age < self.lifetime)
+        if alive.size == 0:
+            return
+
+        buckets = np.minimum((self.age[alive] / self.lifetime * len(self.sprites)).astype(int), len(self.sprites) - 1)
+
+        blits = []
+        for bucket, (x, y) in zip(buckets.tolist(), self.position[alive].tolist()):
+            puff, radius = self.sprites[bucket]
+            blits.append((puff, (x - radius, y - radius)))
+        self.screen.blits(blits, doreturn=False)
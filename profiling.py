@@ -0,0 +1,77 @@
+import json
+import time
+
+from contextlib import contextmanager
+
+PHASES = ('terrain', 'spawn', 'sensors', 'inference', 'termination', 'recording', 'physics', 'collision', 'render', 'fitness')
+COUNTS = ('episodes', 'steps', 'landers', 'lander_steps', 'collisions', 'frames')
+
+class PhaseTimer:
+    """
+    Wall time per phase and event counts for one generation, written as one JSON line per generation.
+    Phases may nest: collision callbacks run inside the physics step and are counted in both.
+    """
+
+    def __init__(self):
+        self.file   = None
+        self.path   = None
+        self.writer = None
+        self.reset()
+
+    def open(self,path:str,writer = None):
+        """ Appends each generation's record to `path`, through `writer` (an ArtifactWriter) when given. """
+        self.path   = path
+        self.writer = writer
+        if not writer:
+            self.file = open(path, 'a', buffering=1)
+
+    def reset(self):
+        self.phases  = dict.fromkeys(PHASES, 0.0)
+        self.counts  = dict.fromkeys(COUNTS, 0)
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def phase(self,name:str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.perf_counter() - start
+
+    def add(self,name:str,seconds:float):
+        self.phases[name] += seconds
+
+    def count(self,name:str,value:int = 1):
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def collect(self) -> dict:
+        """ Hands over what was measured so far, e.g. from a worker process, and starts afresh. """
+        collected = {"phases": self.phases, "counts": self.counts}
+        self.reset()
+        return collected
+
+    def merge(self,collected:dict):
+        for name, seconds in collected["phases"].items():
+            self.phases[name] += seconds
+        for name, value in collected["counts"].items():
+            self.count(name, value)
+
+    def finish(self,generation:int) -> dict:
+        record = {
+            "generation" : generation,
+            "wall"       : time.perf_counter() - self.started,
+            "phases"     : self.phases,
+            "counts"     : self.counts,
+        }
+        if self.writer:
+            self.writer.append(self.path, json.dumps(record) + "\n")
+        elif self.file:
+            self.file.write(json.dumps(record) + "\n")
+        self.reset()
+        return record
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+        self.writer = None
@@ -0,0 +1,126 @@
+import os
+import zipfile
+import numpy as np
+
+COLUMNS = ('x', 'y', 'angle', 'vx', 'vy', 'throttle_l', 'throttle_r', 'fuel')
+
+FLYING, LANDED, DEAD = 0, 1, 2
+
+class TrajectoryRecorder:
+    """
+    Streams per-tick lander state into one .npz per episode: every column is split into chunks of
+    `chunk_ticks` rows (ticks x landers, float32), each its own deflated member, so neither writing
+    nor replaying ever holds more than a chunk per column in memory. Given a `writer` (an
+    ArtifactWriter), chunks are compressed and written on its thread instead of the caller's.
+    """
+
+    def __init__(self,path:str,ids:list[int],meta:dict,chunk_ticks:int = 256,writer = None):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        self.path        = path
+        self.ids         = np.asarray(ids)
+        self.meta        = meta
+        self.chunk_ticks = chunk_ticks
+        self.writer      = writer
+        self.ticks       = 0
+        self.chunks      = 0
+
+        self.buffers = {name: np.zeros((chunk_ticks, len(self.ids)), dtype=np.float32) for name in COLUMNS}
+        self.status  = np.zeros((chunk_ticks, len(self.ids)), dtype=np.uint8)
+        self.last    = {name: np.zeros(len(self.ids), dtype=np.float32) for name in COLUMNS}
+
+        # Written beside the target and renamed on close, a crashed run never leaves a truncated episode
+        self.temp_path = f"{path}.part"
+        self.file      = zipfile.ZipFile(self.temp_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=1)
+
+    def record(self,state:dict,status:np.ndarray,indices = slice(None)):
+        """ Appends a tick; `state` may cover only the landers at `indices`, the rest repeat their last row. """
+        row = self.ticks % self.chunk_ticks
+        for name in COLUMNS:
+            self.last[name][indices] = state[name]
+            self.buffers[name][row]  = self.last[name]
+        self.status[row] = status
+
+        self.ticks += 1
+        if row == self.chunk_ticks - 1:
+            self.flush()
+
+    def write(self,name:str,array:np.ndarray):
+        with self.file.open(f"{name}.npy", 'w', force_zip64=True) as member:
+            np.lib.format.write_array(member, np.asarray(array), allow_pickle=False)
+
+    def run(self,function,*args):
+        # Only the writer thread touches the zip once it has been handed over, so jobs stay in order
+        if self.writer:
+            self.writer.submit(function, *args)
+        else:
+            function(*args)
+
+    def flush(self):
+        rows = self.ticks - self.chunks * self.chunk_ticks
+        if rows <= 0:
+            return
+
+        chunk = {name: self.buffers[name][:rows] for name in COLUMNS}
+        chunk["status"] = self.status[:rows]
+        if self.writer:
+            # The buffers are refilled with the next chunk while this one waits in the queue
+            chunk = {name: array.copy() for name, array in chunk.items()}
+
+        self.run(self.write_chunk, self.chunks, chunk)
+        self.chunks += 1
+
+    def write_chunk(self,index:int,chunk:dict[str,np.ndarray]):
+        for name, array in chunk.items():
+            self.write(f"{name}/{index:05d}", array)
+
+    def close(self):
+        self.flush()
+
+        meta = {"ids": self.ids, "ticks": np.array(self.ticks), "chunk_ticks": np.array(self.chunk_ticks)}
+        meta.update({name: np.asarray(value) for name, value in self.meta.items()})
+        self.run(self.finish, meta)
+
+    def finish(self,meta:dict[str,np.ndarray]):
+        for name, value in meta.items():
+            self.write(name, value)
+
+        self.file.close()
+        os.replace(self.temp_path, self.path)
+
+class Trajectory:
+    """ A recorded episode, read lazily: a chunk is only decompressed when a tick inside it is asked for. """
+
+    def __init__(self,path:str):
+        self.path        = path
+        self.file        = np.load(path)
+        self.ids         = self.file["ids"]
+        self.ticks       = int(self.file["ticks"])
+        self.chunk_ticks = int(self.file["chunk_ticks"])
+        self.cached      = {}
+
+    def __getitem__(self,name:str) -> np.ndarray:
+        return self.file[name]
+
+    def column(self,name:str,chunk:int) -> np.ndarray:
+        key = (name, chunk)
+        if key not in self.cached:
+            # Only the current chunk of each column stays decompressed
+            self.cached = {cached: array for cached, array in self.cached.items() if cached[1] == chunk}
+            self.cached[key] = self.file[f"{name}/{chunk:05d}"]
+        return self.cached[key]
+
+    def index(self,genome_id:int) -> int:
+        matches = np.flatnonzero(self.ids == genome_id)
+        if matches.size == 0:
+            raise KeyError(f"Lander {genome_id} is not in {self.path}")
+        return int(matches[0])
+
+    def state(self,tick:int,indices = slice(None)) -> dict[str,np.ndarray]:
+        chunk, row = divmod(tick, self.chunk_ticks)
+        state = {name: self.column(name, chunk)[row, indices] for name in COLUMNS}
+        state["status"] = self.column("status", chunk)[row, indices]
+        return state
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,89 @@
+import argparse
+import configparser
+import numpy as np
+import pygame
+import pygame.gfxdraw
+
+from recorder import Trajectory,DEAD
+from sprites import sprite_atlas
+
+def draw_background(trajectory:Trajectory,size:tuple[int,int],texture:pygame.Surface) -> pygame.Surface:
+    width, height = size
+    points = [(0, height)] + list(zip(trajectory["terrain_x"].tolist(), trajectory["terrain_y"].tolist())) + [(width, height)]
+
+    background = pygame.Surface(size).convert()
+    background.fill('BLACK')
+    pygame.gfxdraw.textured_polygon(background, points, texture, 0, 0)
+    pygame.draw.circle(background, 'green', trajectory["landing_zone"].tolist(), 5)
+    return background
+
+def replay(path:str,landers:list[int] = None,speed:float = 1.0,
+           lander_config_file:str = "configs/lander.ini",terrain_config_file:str = "configs/terrain.ini"):
+    """ Plays back a recorded episode from its trajectory file; no physics or networks are run. """
+    lander_config  = configparser.ConfigParser()
+    terrain_config = configparser.ConfigParser()
+    lander_config.read(lander_config_file)
+    terrain_config.read(terrain_config_file)
+
+    trajectory = Trajectory(path)
+    size       = tuple(trajectory["size"].tolist())
+    indices    = np.array([trajectory.index(genome_id) for genome_id in landers]) if landers else slice(None)
+
+    print(f"GENERATION: {int(trajectory['generation'])} | SEED: {int(trajectory['seed'])} | "
+          f"LANDERS: {len(trajectory.ids)} | TICKS: {trajectory.ticks}")
+
+    pygame.init()
+    pygame.display.set_caption(f'Genetic Lander Replay - {path}')
+    screen = pygame.display.set_mode(size)
+    clock  = pygame.time.Clock()
+
+    background = draw_background(trajectory, size, pygame.image.load(terrain_config['CONFIG']['texture']).convert())
+    sprites    = sprite_atlas(lander_config['LANDER'].getfloat('sprite_angle_step', fallback=2.0),
+                              lander_config['LANDER'].getint('sprite_cache_size', fallback=1024))
+    textures   = [lander_config['LANDER'][name] for name in
+                  ('texture_default', 'texture_left_engine', 'texture_right_engine', 'texture_both_engine')]
+
+    fps    = speed / float(trajectory["timestep"])
+    tick   = 0
+    paused = False
+    while tick < trajectory.ticks:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    paused = not paused
+                if event.key == pygame.K_ESCAPE:
+                    return
+
+        if paused:
+            clock.tick(30)
+            continue
+
+        state = trajectory.state(tick, indices)
+        shown = state["status"] != DEAD
+        # Texture index: bit 0 left engine, bit 1 right engine, as ordered in `textures`
+        skins = (state["throttle_l"] > 0.1).astype(int) + 2 * (state["throttle_r"] > 0.1)
+
+        screen.blit(background, (0, 0))
+        for x, y, angle, skin in zip(state["x"][shown].tolist(), state["y"][shown].tolist(),
+                                     np.degrees(state["angle"][shown]).tolist(), skins[shown].tolist()):
+            frame = sprites.rotated(textures[skin], angle)
+            screen.blit(frame, frame.get_rect(center=(x, y)))
+
+        pygame.display.flip()
+        clock.tick(fps)
+        tick += 1
+
+    trajectory.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay a recorded episode")
+    parser.add_argument('trajectory', type=str, help="Path to a trajectory file, e.g. runs/<run>/trajectories/gen-00010-t0.npz")
+    parser.add_argument('-l', '--landers', type=int, nargs='*', help="Genome ids to show, all landers by default")
+    parser.add_argument('-s', '--speed', type=float, default=1.0, help="Playback speed relative to simulated time")
+    parser.add_argument('-cl', '--config_lander', type=str, default="configs/lander.ini", help="Path to lander config")
+    parser.add_argument('-ct', '--config_terrain', type=str, default="configs/terrain.ini", help="Path to terrain config")
+    args = parser.parse_args()
+
+    replay(args.trajectory, args.landers, args.speed, args.config_lander, args.config_terrain)
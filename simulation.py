@@ -1,3 +1,4 @@
+import io
 import os
 import csv
 import neat
@@ -8,25 +9,42 @@ import neat.genome
 import pygame
 import pygame.gfxdraw
 import pymunk
+import cProfile
 import datetime
+import numpy as np
 import configparser
+import multiprocessing
 
 from pymunk.pygame_util import DrawOptions
 
-from lander import TwinFlameCan
-from utils import plot_stats,plot_species,pairwise,Noise
+from lander import TwinFlameCan,LanderSpec
+from artifacts import ArtifactWriter,AsyncCheckpointer
+from batch_physics import BatchLanderPhysics
+from batch_network import BatchNetwork,throttles
+from fitness import FitnessAggregate,AGGREGATES,fitness_kernel
+from profiling import PhaseTimer
+from recorder import TrajectoryRecorder,FLYING,LANDED,DEAD
+from termination import TerminationPolicy
+from terrain import TerrainQuery,TerrainCache,landing_zone
+from text import TextRenderer,get_font
+from utils import plot_stats,plot_species,pairwise,sub_seed,Noise
 
 class GeneticSimulation:
     def __init__(self,
                  simulation_config_file : str,
                  lander_config_file  : str,
                  terrain_config_file : str,
-                 headless       : bool = False):
+                 headless       : bool = False,
+                 workers        : int  = 1,
+                 backend        : str  = None,
+                 seed           : int  = None):
         
         if headless:
             os.environ["SDL_VIDEODRIVER"] = "dummy" 
             
         self.headless   = headless
+        self.workers    = workers
+        self.pool       = None
 
         self.simulation_config = configparser.ConfigParser()
         self.lander_config     = configparser.ConfigParser()
@@ -37,10 +55,19 @@ class GeneticSimulation:
         self.terrain_config.read(terrain_config_file)
 
         self.simulation_config_file = simulation_config_file
+        self.lander_config_file     = lander_config_file
+        self.terrain_config_file    = terrain_config_file
         self.run_folder  = f'runs/{datetime.datetime.now()}'
+        self.fitness_file = None
 
         self.generations = int(self.simulation_config['SIMULATION']['GENERATIONS'])
 
+        # NEAT, terrains and spawns all derive from this seed; without one configured a fresh one is drawn and reported
+        configured = self.simulation_config['SIMULATION'].get('SEED', fallback='').strip()
+        if seed is None and configured:
+            seed = int(configured)
+        self.seed = seed if seed is not None else random.SystemRandom().randrange(2**32)
+
         self.sim_width    = int(self.simulation_config['SIMULATION']['SIM_WIDTH'])
         self.stat_width   = int(self.simulation_config['SIMULATION']['STAT_WIDTH'])
         self.screen_width = self.sim_width + self.stat_width
@@ -54,17 +81,77 @@ class GeneticSimulation:
         self.sim_screen    = self.render_screen.subsurface((0, 0, self.sim_width, self.height))
         self.stat_screen   = self.render_screen.subsurface((self.sim_width,0,200,self.height))
 
+        self.text     = TextRenderer(get_font(None, 18))
+        self.stat_key = None
+
+        # Dirty rects pushed to the display last frame; None asks for a full redraw
+        self.debug_draw = self.simulation_config['SIMULATION'].getboolean('DEBUG_DRAW', fallback=False)
+        self.dirty      = None
+        self.stat_dirty = False
+
         self.clock = pygame.time.Clock()
         self.fps   = int(self.simulation_config['SIMULATION']['FPS'])
 
+        # Physics runs at a fixed rate whatever the display does; controllers act once per tick
+        self.physics_hz   = int(self.simulation_config['SIMULATION'].get('PHYSICS_HZ', fallback=self.fps))
+        self.substeps     = max(1, self.simulation_config['SIMULATION'].getint('SUBSTEPS', fallback=1))
+        self.timestep     = 1 / self.physics_hz
+        self.substep      = self.timestep / self.substeps
+        self.render_every = self.simulation_config['SIMULATION'].getint('RENDER_EVERY', fallback=1)
+        # At most one frame per tick, so a display faster than the physics is paced at the physics rate
+        self.frame_rate   = min(self.fps, self.physics_hz)
+        self.generation   = 0
+
         self.terrain = {
             "texture" : pygame.image.load(self.terrain_config['CONFIG']['texture']).convert(),
+            "background" : None,
             "body": None,
             "segments" : [],
             "segment_coords" : [],
+            "query" : None,
+            "key" : None,
+            "landing_zone" : None,
             "segment_length" : int(self.terrain_config['CONFIG']['segment_length'])
         }
 
+        self.terrain_cache = None
+        if self.terrain_config['CONFIG'].getboolean('cache', fallback=False):
+            self.terrain_cache = TerrainCache(self.terrain_config['CONFIG'].get('cache_folder', fallback='runs/terrain_cache'),
+                                              max_files=self.terrain_config['CONFIG'].getint('cache_max_files', fallback=256))
+
+        self.backend = backend or self.simulation_config['SIMULATION'].get('BACKEND', fallback='pymunk')
+        if self.backend not in ('pymunk', 'batch'):
+            raise ValueError(f"Unknown physics backend: {self.backend}")
+
+        self.batch_inference = self.simulation_config['SIMULATION'].getboolean('BATCH_INFERENCE', fallback=True)
+        self.network:BatchNetwork = None
+
+        self.eval_terrains     = self.simulation_config['SIMULATION'].getint('EVAL_TERRAINS', fallback=1)
+        self.fitness_aggregate = self.simulation_config['SIMULATION'].get('FITNESS_AGGREGATE', fallback='mean')
+        self.fitness_quantile  = self.simulation_config['SIMULATION'].getfloat('FITNESS_QUANTILE', fallback=0.1)
+        if self.fitness_aggregate not in AGGREGATES:
+            raise ValueError(f"Unknown fitness aggregate: {self.fitness_aggregate}")
+
+        self.termination = None
+        if self.simulation_config.has_section('TERMINATION'):
+            self.termination = TerminationPolicy(self.simulation_config['TERMINATION'],
+                                                 self.timestep,
+                                                 float(self.simulation_config['SIMULATION']['GRAVITY']),
+                                                 int(self.lander_config['LANDER']['max_engine_power']),
+                                                 self.sim_width)
+
+        self.record_every       = self.simulation_config.getint('RECORDER', 'record_every', fallback=0)
+        self.record_chunk_ticks = self.simulation_config.getint('RECORDER', 'chunk_ticks', fallback=256)
+
+        # Fitness rows, metrics, checkpoints and recordings are written off the training thread
+        self.artifacts        = ArtifactWriter(self.simulation_config.getfloat('ARTIFACTS', 'flush_interval', fallback=5.0))
+        self.checkpoint_every = self.simulation_config.getint('ARTIFACTS', 'checkpoint_every', fallback=10)
+
+        self.metrics             = PhaseTimer()
+        self.metrics_enabled     = self.simulation_config.getboolean('PROFILING', 'metrics', fallback=False)
+        self.profile_generations = {int(generation) for generation in
+                                    self.simulation_config.get('PROFILING', 'profile_generations', fallback='').split(',') if generation.strip()}
+
         self.gravity        = float(self.simulation_config['SIMULATION']['GRAVITY'])
         self.space          = pymunk.Space()
         self.space.gravity  = (0, self.gravity)
@@ -80,13 +167,23 @@ class GeneticSimulation:
         }
 
         self.lander_config['SIMULATION']['category'] = str(self.category['lander'])
+        self.lander_config['SIMULATION']['headless'] = str(self.headless)
+        self.lander_config['SIMULATION']['debug']    = str(self.debug_draw and not self.headless)
+        self.lander_config['SIMULATION']['timestep'] = str(self.substep)
+        self.lander_spec = LanderSpec(self.lander_config)
 
         self.landers:list[TwinFlameCan]  = []
         self.focused_lander:TwinFlameCan = None
+        self.body_landers:dict[pymunk.Body,TwinFlameCan] = {}
+        self.lander_pool:list[TwinFlameCan] = []
 
         self.collion_handler = self.space.add_collision_handler(self.category['lander'],self.category['terrain'])
         self.collion_handler.pre_solve = self.handle_collision
 
+    def frame_due(self,steps:int) -> bool:
+        """ True on the ticks a frame starts: PHYSICS_HZ / FPS ticks apart on average, the fraction carried over. """
+        return steps == 0 or steps * self.frame_rate // self.physics_hz > (steps - 1) * self.frame_rate // self.physics_hz
+
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -96,6 +193,8 @@ class GeneticSimulation:
                     self.paused = not self.paused
                 if event.key == pygame.K_ESCAPE:
                     exit()
+                if event.key == pygame.K_d:
+                    self.toggle_debug_draw()
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 self.handle_mouse_click(event)
 
@@ -108,99 +207,108 @@ class GeneticSimulation:
         self.focused_lander = None
     
     def handle_collision(self,arbiter:pymunk.Arbiter,space,data):
+        start = time.perf_counter()
+        # One lookup per shape instead of a scan over the population; the terrain body is never in the map
         for shape in arbiter.shapes:
-            if shape.body.body_type == pymunk.Body.DYNAMIC:
-                static_id = shape.body.id
-                for lander in self.landers:
-                    if not lander.landed:
-                        if lander.body:
-                            if lander.body.id == static_id:
-                                lander.set_collided(arbiter.total_impulse)
+            lander = self.body_landers.get(shape.body)
+            if lander and not lander.landed:
+                lander.set_collided(arbiter.total_impulse)
+        self.metrics.add('collision', time.perf_counter() - start)
+        self.metrics.count('collisions')
+        return True
 
     def display_stat(self,paused):
-        if not self.focused_lander:
-            return
-        
-        lander_texture = self.focused_lander.lander_texture
-        screen_width   = self.stat_width
-        texture_width  = lander_texture.get_width()
-
-        self.stat_screen.blit(lander_texture,(screen_width/2 - texture_width/2,10))
-
-        font = pygame.font.SysFont(None, 18)
-        
-        img = font.render(f"POS X: {self.focused_lander.current_pos[0]:.3f}", False, "WHITE")
-        self.stat_screen.blit(img, (5, 80))
-
-        img = font.render(f"POS Y: {self.focused_lander.current_pos[1]:.3f}", False, "WHITE")
-        self.stat_screen.blit(img, (5, 100))
+        lander = self.focused_lander
+        rows   = None
+        if lander:
+            rows = (
+                ("POS X: ", f"{lander.current_pos[0]:.3f}"),
+                ("POS Y: ", f"{lander.current_pos[1]:.3f}"),
+                ("VEL X: ", f"{lander.vel_x:.3f}"),
+                ("VEL Y: ", f"{lander.vel_y:.3f}"),
+                ("ANGLE: ", f"{lander.angle:.3f}"),
+                ("R VEL: ", f"{lander.angular_vel:.3f}"),
+                ("ZON L: ", f"{lander.zone_dist_l:.3f}"),
+                ("ZON R: ", f"{lander.zone_dist_r:.3f}"),
+                ("SLOPE: ", f"{lander.slope:.3f}"),
+                ("HGHT : ", f"{lander.distance_to_surface:.3f}"),
+                ("LAND?: ", f"{lander.landed}"),
+                ("ALIVE: ", f"{lander.is_alive()}"),
+                ("COD  : ", f"{lander.cause_of_death}"),
+                ("ID   : ", f"{lander.body.id}"),
+                ("VEL L: ", f"{lander.land_velocity}"),
+            )
 
-        img = font.render(f"VEL X: {self.focused_lander.vel_x:.3f}", False, "WHITE")
-        self.stat_screen.blit(img, (5, 120))
+        # The panel keeps its pixels between frames, only redraw it when something shown changed
+        key = (id(lander), lander.lander_texture if lander else None, rows)
+        if key != self.stat_key:
+            self.stat_key = key
+            self.stat_screen.fill('BLACK')
 
-        img = font.render(f"VEL Y: {self.focused_lander.vel_y:.3f}", False, "WHITE")
-        self.stat_screen.blit(img, (5, 140))
+            if lander:
+                lander_texture = lander.lander_texture
+                texture_width  = lander_texture.get_width()
+                self.stat_screen.blit(lander_texture,(self.stat_width/2 - texture_width/2,10))
 
-        img = font.render(f"ANGLE: {self.focused_lander.angle:.3f}", False, "WHITE")
-        self.stat_screen.blit(img, (5, 160))
+                for row, (label, value) in enumerate(rows):
+                    self.text.blit(self.stat_screen, label, value, (5, 80 + 20 * row))
 
-        img = font.render(f"R VEL: {self.focused_lander.angular_vel:.3f}", False, "WHITE")
-        self.stat_screen.blit(img, (5, 180))
+            self.stat_dirty = True
 
-        img = font.render(f"ZON L: {self.focused_lander.zone_dist_l:.3f}", False, "WHITE")
-        self.stat_screen.blit(img, (5, 200))
+        if paused:
+            pygame.display.flip()
 
-        img = font.render(f"ZON R: {self.focused_lander.zone_dist_r:.3f}", False, "WHITE")
-        self.stat_screen.blit(img, (5, 220))
-        
-        img = font.render(f"SLOPE: {self.focused_lander.slope:.3f}", False, "WHITE")
-        self.stat_screen.blit(img, (5, 240))
+    def terrain_profile(self,seed:int = None) -> dict:
+        noise_generator     = Noise(seed)
+        base_surface_height = int(self.terrain_config['CONFIG']['base_surface_height'])
+        min_surface_height  = int(self.terrain_config['CONFIG']['min_surface_height'])
 
-        img = font.render(f"HGHT : {self.focused_lander.distance_to_surface:.3f}", False, "WHITE")
-        self.stat_screen.blit(img, (5, 260))
+        base_height = self.height - base_surface_height
 
-        img = font.render(f"LAND?: {self.focused_lander.landed}", False, "WHITE")
-        self.stat_screen.blit(img, (5, 280))
+        breaks = np.arange(self.terrain["segment_length"], self.sim_width, self.terrain["segment_length"])
+        xs     = np.concatenate(([0], breaks, [self.sim_width])).astype(float)
 
-        img = font.render(f"ALIVE: {self.focused_lander.is_alive()}", False, "WHITE")
-        self.stat_screen.blit(img, (5, 300))
+        # The closing point reuses the noise of the last break, as the segment walk always did
+        noise_values = noise_generator.generate_profile(xs[1:-1] / self.sim_width) * 100
+        noise_values = np.append(noise_values, noise_values[-1] if len(noise_values) else 0.0)
 
-        img = font.render(f"COD  : {self.focused_lander.cause_of_death}", False, "WHITE")
-        self.stat_screen.blit(img, (5, 320))
+        ys = np.minimum(self.height - min_surface_height, base_height + noise_values)
+        ys = np.concatenate(([base_height], ys)).astype(float)
 
-        img = font.render(f"ID   : {self.focused_lander.body.id}", False, "WHITE")
-        self.stat_screen.blit(img, (5, 340))
+        heights = np.interp(np.arange(self.sim_width + 1), xs, ys)
 
-        img = font.render(f"VEL L: {self.focused_lander.land_velocity}", False, "WHITE")
-        self.stat_screen.blit(img, (5, 360))
+        return {
+            "xs": xs,
+            "ys": ys,
+            "heights": heights,
+            "landing_zone": np.array(landing_zone(heights)),
+            "base_height": np.array(base_height)
+        }
 
-        if paused:
-            pygame.display.flip()
+    def generate_terrain(self,seed:int = None):
+        key = None
+        if self.terrain_cache and seed is not None:
+            key = self.terrain_cache.key(seed, self.terrain_config['CONFIG'], {"width": self.sim_width, "height": self.height, "noise": "gradient-nonzero-seeds"})
+            if key == self.terrain["key"]:
+                return
 
-    def generate_terrain(self):
-        noise_generator     = Noise()
-        base_surface_height = int(self.terrain_config['CONFIG']['base_surface_height'])
-        min_surface_height  = int(self.terrain_config['CONFIG']['min_surface_height'])
+        if self.terrain["body"]:
+            self.remove_terrain()
 
-        self.base_height    = self.height - base_surface_height
+        profile = self.terrain_cache.load(key) if key else None
+        if profile is None:
+            profile = self.terrain_profile(seed)
+            if key:
+                self.terrain_cache.store(key, profile)
 
-        prev_x = 0
-        prev_y = self.base_height
+        self.base_height = float(profile["base_height"])
+        points           = list(zip(profile["xs"].tolist(), profile["ys"].tolist()))
 
-        for x in range(self.terrain["segment_length"], self.sim_width, self.terrain["segment_length"]):
-        
-            noise_value = noise_generator.generate_noise([x / self.sim_width, 0]) * 100
-            y = self.base_height + noise_value
-            y = min(self.height - min_surface_height, y)
-            self.terrain["segment_coords"].append(((prev_x, prev_y), (x, y)))
-            prev_x = x
-            prev_y = y
-
-        if prev_x < self.sim_width:
-            noise_value = noise_generator.generate_noise([prev_x / self.sim_width, 0]) * 100
-            y = self.base_height + noise_value
-            y = min(self.height - min_surface_height, y)
-            self.terrain["segment_coords"].append(((prev_x, prev_y), (self.sim_width, y)))
+        self.terrain["key"]            = key
+        self.terrain["background"]     = None
+        self.terrain["segment_coords"] = list(zip(points[:-1], points[1:]))
+        self.terrain["landing_zone"]   = tuple(profile["landing_zone"].tolist())
+        self.terrain["query"]          = TerrainQuery(self.terrain["segment_coords"])
 
         # Create the static body for the terrain
         self.terrain["body"] = pymunk.Body(body_type=pymunk.Body.STATIC)
@@ -225,25 +333,67 @@ class GeneticSimulation:
             segment.filter = pymunk.ShapeFilter(categories=self.category['terrain'], mask=self.mask['terrain'])
             self.space.add(segment)
 
-    def draw_terrain(self):
-        for x in self.terrain["segment_coords"]:
-            pygame.draw.circle(self.sim_screen,'red',x[0],4)
-            pygame.draw.circle(self.sim_screen,'green',x[1],4)
-        
+    def draw_terrain(self,screen:pygame.Surface):
         points = [(0,self.height),self.terrain["segment_coords"][0][0]]
         for segment in self.terrain["segment_coords"]:
             points.append(segment[1])
         points.append((self.sim_width,self.height))
 
-        pygame.gfxdraw.textured_polygon(self.sim_screen,points,self.terrain["texture"],0,0)
+        pygame.gfxdraw.textured_polygon(screen,points,self.terrain["texture"],0,0)
+        pygame.draw.circle(screen,'green',self.terrain["landing_zone"],5)
+
+    def terrain_background(self) -> pygame.Surface:
+        """ The terrain is static for a generation, so it is rasterized once and frames blit it. """
+        if self.terrain["background"] is None:
+            background = pygame.Surface(self.sim_screen.get_size()).convert()
+            background.fill('BLACK')
+            self.draw_terrain(background)
+            self.terrain["background"] = background
+        return self.terrain["background"]
+
+    def draw_debug(self,draw_options:DrawOptions = None):
+        if draw_options:
+            self.space.debug_draw(draw_options)
+        for x in self.terrain["segment_coords"]:
+            pygame.draw.circle(self.sim_screen,'red',x[0],4)
+            pygame.draw.circle(self.sim_screen,'green',x[1],4)
+
+    def toggle_debug_draw(self):
+        self.debug_draw = not self.debug_draw
+        self.dirty      = None
+        self.lander_config['SIMULATION']['debug'] = str(self.debug_draw)
+        self.lander_spec.debug = self.debug_draw
+        for lander in self.landers:
+            lander.debug = self.debug_draw
+
+    def begin_frame(self):
+        """ Restores the background under last frame's landers, or all of it when a full redraw is due. """
+        background = self.terrain_background()
+        if self.dirty is None or self.debug_draw:
+            self.sim_screen.blit(background, (0, 0))
+        else:
+            for rect in self.dirty:
+                self.sim_screen.blit(background, rect, rect)
+
+    def end_frame(self,rects:list[pygame.Rect]):
+        """ Pushes only what changed: where landers were, where they are now and the stats panel if redrawn. """
+        if self.dirty is None or self.debug_draw:
+            pygame.display.flip()
+        else:
+            updated = self.dirty + rects
+            if self.stat_dirty:
+                updated.append(self.stat_screen.get_rect(topleft=self.stat_screen.get_abs_offset()))
+            pygame.display.update(updated)
+
+        self.dirty      = rects
+        self.stat_dirty = False
 
     def remove_landers(self):
+        # Landers that died or touched down already left the space
         for lander in self.landers:
-            try:
-                self.space.remove(lander.shape)
-                self.space.remove(lander.body)
-            except:
-                pass
+            if lander.body.space:
+                self.space.remove(lander.shape, lander.body)
+        self.body_landers = {}
 
     def remove_terrain(self):
         for x in self.terrain["segments"]:
@@ -251,68 +401,457 @@ class GeneticSimulation:
         self.space.remove(self.terrain["body"])
 
         self.terrain['segments'] = []
+        self.terrain['body'] = None
         self.terrain['segment_coords'] = []
+        self.terrain['query'] = None
+        self.terrain['key'] = None
+        self.terrain['background'] = None
 
     def run(self,resume_path:str = None):
         os.mkdir(self.run_folder)
+        self.fitness_file = os.path.join(self.run_folder, 'fitness_data.csv')
+        if self.metrics_enabled:
+            self.metrics.open(os.path.join(self.run_folder, 'metrics.jsonl'), self.artifacts)
         config = neat.Config(neat.DefaultGenome, neat.DefaultReproduction,
                              neat.DefaultSpeciesSet, neat.DefaultStagnation,
                              self.simulation_config_file)
         
+        # NEAT draws from the global random module; a checkpoint restores that state itself
         if resume_path:
-            population = neat.Checkpointer().restore_checkpoint(resume_path)
+            population      = neat.Checkpointer().restore_checkpoint(resume_path)
+            self.generation = population.generation
         else:
+            random.seed(self.seed)
             population = neat.Population(config)
 
+        print(f"SEED: {self.seed}")
+        self.artifacts.write(os.path.join(self.run_folder, 'seed.txt'), f"{self.seed}\n".encode())
+
         stats = neat.StatisticsReporter()
         population.add_reporter(stats)
         population.add_reporter(neat.StdOutReporter(True))
-        population.add_reporter(neat.Checkpointer(10,filename_prefix=f"{self.run_folder}/ckpt-"))
-
-        winner = population.run(self.simulation, self.generations)
-        pickle.dump(winner, open(os.path.join(self.run_folder, 'winner.pkl'), 'wb'))     
+        population.add_reporter(AsyncCheckpointer(self.artifacts, self.checkpoint_every, filename_prefix=f"{self.run_folder}/ckpt-"))
+
+        if self.workers > 1:
+            # Spawned workers start with a clean SDL state instead of a forked copy of ours.
+            self.pool = multiprocessing.get_context('spawn').Pool(self.workers,
+                                                                  initializer=_init_worker,
+                                                                  initargs=(self.simulation_config_file,
+                                                                            self.lander_config_file,
+                                                                            self.terrain_config_file,
+                                                                            self.backend))
+        try:
+            winner = population.run(self.simulation, self.generations)
+            self.artifacts.write(os.path.join(self.run_folder, 'winner.pkl'), pickle.dumps(winner))
+        finally:
+            self.metrics.close()
+            if self.pool:
+                self.pool.close()
+                self.pool.join()
+                self.pool = None
+            # Whatever is still queued reaches the disk before the run returns, even after an error
+            self.artifacts.close()
 
     def simulation(self,genomes: list[tuple[int,neat.genome.DefaultGenome]],config):
-        self.landers = []
-
-        for genome_id, genome in genomes:
-            genome.fitness = 10000000
-            lander = TwinFlameCan(self.sim_screen,
-                                   self.space,
-                                   self.terrain,
-                                   {"id":genome_id,"network":neat.nn.FeedForwardNetwork.create(genome,config)},
-                                   self.lander_config)
-            lander.shape.filter = pymunk.ShapeFilter(categories = self.category['lander'], mask=self.mask['lander'])
-            self.landers.append(lander)
+        profiler = None
+        if self.generation in self.profile_generations:
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        self.metrics.reset()
+        # Terrain seeds depend only on the run seed and generation, not on how much NEAT drew from random
+        seeds = [sub_seed(self.seed, self.generation, index) for index in range(self.eval_terrains)]
+
+        recording = None
+        if self.record_every > 0 and self.generation % self.record_every == 0:
+            recording = os.path.join(self.run_folder, 'trajectories', f'gen-{self.generation:05d}')
+
+        if self.pool:
+            shards  = [(genomes[i::self.workers], config, seeds, recording and f"{recording}-w{i}", self.generation)
+                       for i in range(self.workers)]
+            results = {}
+            # Worker phase times are summed across workers, so they can exceed the generation's wall time
+            for shard_results, shard_metrics in self.pool.map(_evaluate_shard, shards):
+                results.update(shard_results)
+                self.metrics.merge(shard_metrics)
+            # Back in genome order, so averages sum in the same order whatever the worker count
+            results = {genome_id: results[genome_id] for genome_id, _ in genomes}
+        else:
+            results = self.evaluate_terrains(genomes, config, seeds, recording)
+
+        with self.metrics.phase('fitness'):
+            for genome_id, genome in genomes:
+                genome.fitness = results[genome_id]
+            self.write_fitness(results)
+
+        record = self.metrics.finish(self.generation)
+        print("PHASES: " + " | ".join(f"{name}: {seconds:.2f}s" for name, seconds in record["phases"].items() if seconds)
+              + f" | wall: {record['wall']:.2f}s")
+
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(os.path.join(self.run_folder, f'profile-gen-{self.generation:05d}.prof'))
+
+        self.generation += 1
+
+    def write_fitness(self,results:dict[int,float]):
+        if not self.fitness_file:
+            return
+
+        fitness = np.fromiter(results.values(), dtype=float)
+        row     = io.StringIO()
+        csv.writer(row).writerow([self.generation, fitness.mean(), fitness.max()])
+        self.artifacts.append(self.fitness_file, row.getvalue(), header='Run,Avg Fitness,Best Fitness\r\n')
+
+    def rendering(self) -> bool:
+        """ Whether this generation is drawn; others run at full speed behind an idle window. """
+        if self.headless or self.render_every <= 0:
+            return False
+        return self.generation % self.render_every == 0
+
+    def evaluate_terrains(self,genomes: list[tuple[int,neat.genome.DefaultGenome]],config,seeds:list[int],recording:str = None) -> dict[int,float]:
+        # One terrain at a time, shared by every genome, folded into the aggregate as it finishes
+        aggregate = FitnessAggregate([genome_id for genome_id, _ in genomes], self.fitness_aggregate, self.fitness_quantile)
+        for index, seed in enumerate(seeds):
+            record = f"{recording}-t{index}.npz" if recording else None
+            aggregate.update(self.evaluate(genomes, config, seed, record))
+        return aggregate.result()
+
+    def start_recording(self,path:str,ids:list[int],seed:int) -> TrajectoryRecorder:
+        if not path:
+            return None
+
+        # Everything replay.py needs to redraw the episode without regenerating the terrain
+        return TrajectoryRecorder(path, ids, {
+            "seed"         : seed,
+            "generation"   : self.generation,
+            "timestep"     : self.timestep,
+            "size"         : (self.sim_width, self.height),
+            "terrain_x"    : self.terrain["query"].xs,
+            "terrain_y"    : self.terrain["query"].ys,
+            "landing_zone" : self.terrain["landing_zone"],
+        }, self.record_chunk_ticks, self.artifacts)
+
+    def record_landers(self,recorder:TrajectoryRecorder,everyone:bool = False):
+        # Landed and dead landers no longer move, so only flying ones are read back (all on the first tick)
+        landers = [lander for lander in self.landers if everyone or (lander.alive and not lander.landed)]
+        recorder.record({
+            "x"          : [lander.position[0] for lander in landers],
+            "y"          : [lander.position[1] for lander in landers],
+            "angle"      : [lander.angle for lander in landers],
+            "vx"         : [lander.vel_x for lander in landers],
+            "vy"         : [lander.vel_y for lander in landers],
+            "throttle_l" : [lander.throttle_l for lander in landers],
+            "throttle_r" : [lander.throttle_r for lander in landers],
+            "fuel"       : [lander.fuel for lander in landers],
+        }, [DEAD if not lander.alive else LANDED if lander.landed else FLYING for lander in self.landers],
+           [lander.nn_data["index"] for lander in landers])
+
+    def evaluate(self,genomes: list[tuple[int,neat.genome.DefaultGenome]],config,seed:int,record:str = None) -> dict[int,float]:
+        if self.backend == 'batch':
+            return self.evaluate_batch(genomes, config, seed, record)
+
+        with self.metrics.phase('spawn'):
+            self.spawn_landers(genomes, config, seed)
 
         draw_options = DrawOptions(self.sim_screen)
 
-        self.generate_terrain()
+        with self.metrics.phase('terrain'):
+            self.generate_terrain(seed)
+        recorder = self.start_recording(record, [genome_id for genome_id, _ in genomes], seed)
 
-        self.running = True
         self.paused  = False
-        while self.running:
-            self.running = any(lander.alive and not lander.landed for lander in self.landers)
-            self.handle_events()
-            self.stat_screen.fill('BLACK')
-            self.display_stat(self.paused)
-            
-            if self.paused:
-                continue
-            
-            self.sim_screen.fill('BLACK')
-            self.space.debug_draw(draw_options)
-            
-            self.draw_terrain()
+        self.ended   = False
+        steps        = 0
+        start_time   = time.perf_counter()
+        if self.termination:
+            self.termination.start(len(self.landers))
+
+        render     = self.rendering()
+        self.dirty = None
+
+        # Checked before each tick, as the batch loop does, so the final state is recorded once after the loop
+        while any(lander.alive and not lander.landed for lander in self.landers):
+            due   = self.frame_due(steps)
+            frame = render and due
+
+            if not self.headless and due:
+                self.handle_events()
+                # Time spent paused is not render time, so the pause screen is kept up outside the phase timer
+                if frame and self.paused:
+                    self.display_stat(self.paused)
+                    self.dirty = None
+                    continue
+
+            if frame:
+                with self.metrics.phase('render'):
+                    self.display_stat(self.paused)
+                    self.begin_frame()
+                    if self.debug_draw:
+                        self.draw_debug(draw_options)
+
+            self.update_landers()
+            with self.metrics.phase('termination'):
+                self.terminate_landers(steps)
+            # The policy ended the episode on this tick, nothing after it should run again
+            if self.ended:
+                break
+            if recorder:
+                with self.metrics.phase('recording'):
+                    self.record_landers(recorder, everyone=steps == 0)
+
+            if frame:
+                with self.metrics.phase('render'):
+                    self.end_frame([lander.draw() for lander in self.landers if lander.is_alive()])
+                self.clock.tick(self.frame_rate)
+                self.metrics.count('frames')
+
+            with self.metrics.phase('physics'):
+                self.step_physics()
+            steps += 1
+
+        elapsed = time.perf_counter() - start_time
+        print(f"STEPS: {steps} | STEPS/SEC: {steps / max(elapsed, 1e-9):.1f}")
+        if self.termination:
+            print(self.termination.report(steps))
+
+        self.metrics.count('episodes')
+        self.metrics.count('steps', steps)
+        self.metrics.count('landers', len(self.landers))
+
+        if recorder:
+            with self.metrics.phase('recording'):
+                self.record_landers(recorder)
+                recorder.close()
+
+        self.remove_landers()
+
+        # Landers sit in genome order, so ids and scores line up by index
+        return dict(zip([genome_id for genome_id, _ in genomes], self.landers_fitness(self.landers).tolist()))
+
+    def landers_fitness(self,landers:list[TwinFlameCan]) -> np.ndarray:
+        """ Scores final lander states in one fitness_kernel pass, as the batch backend does. """
+        landed   = np.array([lander.landed for lander in landers], dtype=bool)
+        velocity = np.where(landed,
+                            np.array([lander.land_velocity for lander in landers], dtype=float),
+                            np.hypot(np.array([lander.vel_x for lander in landers], dtype=float),
+                                     np.array([lander.vel_y for lander in landers], dtype=float)))
+        return fitness_kernel(np.array([lander.distance_to_surface for lander in landers], dtype=float), velocity, landed)
+
+    def spawn_landers(self,genomes: list[tuple[int,neat.genome.DefaultGenome]],config,seed:int):
+        self.landers      = []
+        self.body_landers = {}
+        self.network = BatchNetwork(genomes, config) if self.batch_inference else None
+
+        for index, (genome_id, genome) in enumerate(genomes):
+            network = None if self.network else neat.nn.FeedForwardNetwork.create(genome,config)
+            nn_data = {"id":genome_id,"index":index,"network":network}
+
+            # Pooled landers keep their body, shape and textures across episodes, only their state is reset
+            if index < len(self.lander_pool):
+                lander = self.lander_pool[index]
+                lander.reset(nn_data, seed=f"{seed}-{genome_id}")
+            else:
+                lander = TwinFlameCan(self.sim_screen,
+                                       self.space,
+                                       self.terrain,
+                                       nn_data,
+                                       self.lander_config,
+                                       seed=f"{seed}-{genome_id}",
+                                       spec=self.lander_spec)
+                lander.shape.filter = pymunk.ShapeFilter(categories = self.category['lander'], mask=self.mask['lander'])
+                self.lander_pool.append(lander)
+
+            self.landers.append(lander)
+            self.body_landers[lander.body] = lander
+
+    def update_landers(self):
+        with self.metrics.phase('sensors'):
             for lander in self.landers:
                 if lander.is_alive():
-                   lander.update()
-                   lander.draw()
-            
-            pygame.display.flip()
-            self.space.step(1/(self.fps))
-            self.clock.tick(self.fps)
+                    lander.update()
 
-        self.remove_terrain()
-        self.remove_landers()
+            flying = [lander for lander in self.landers if lander.alive and not lander.landed]
+            if not flying:
+                return
+            self.metrics.count('lander_steps', len(flying))
+
+        with self.metrics.phase('inference'):
+            if self.network:
+                outputs = self.network.activate([lander.sensors() for lander in flying],
+                                                [lander.nn_data["index"] for lander in flying])
+                for lander, (output_l, output_r) in zip(flying, outputs.tolist()):
+                    lander.set_throttle(output_l, output_r)
+            else:
+                for lander in flying:
+                    lander.think()
+
+    def step_physics(self):
+        # Engine forces are cleared by every space.step, so thrust is reapplied per substep
+        for _ in range(self.substeps):
+            for lander in self.landers:
+                if lander.alive and not lander.landed:
+                    lander.apply_thrust()
+            self.space.step(self.substep)
+
+    def terminate_landers(self,steps:int):
+        if not self.termination:
+            return
+
+        flying = [lander for lander in self.landers if lander.alive and not lander.landed]
+        if not flying:
+            return
+
+        finished = []
+        if self.termination.cutoff:
+            finished = self.landers_fitness([lander for lander in self.landers if not lander.alive or lander.landed]).tolist()
+        ending, stalled, falling, velocity, escaped = self.termination.decide(
+            steps,
+            np.array([lander.nn_data["index"] for lander in flying]),
+            np.array([lander.current_pos[0] for lander in flying], dtype=float),
+            np.array([lander.distance_to_surface for lander in flying]),
+            np.array([lander.vel_x for lander in flying]),
+            np.array([lander.vel_y for lander in flying]),
+            np.array([lander.fuel for lander in flying]),
+            np.array([lander.spec.dry_weight + lander.fuel for lander in flying]),
+            max(finished) if finished else None)
+
+        if ending:
+            self.ended = True
+            return
+
+        for index in stalled:
+            self.landers[index].kill("stalled")
+        for index, land_velocity, out_of_bounds in zip(falling, velocity.tolist(), escaped.tolist()):
+            if out_of_bounds:
+                self.landers[index].kill("escaped the universe")
+            else:
+                self.landers[index].touch_down(land_velocity)
+
+    def evaluate_batch(self,genomes: list[tuple[int,neat.genome.DefaultGenome]],config,seed:int,record:str = None) -> dict[int,float]:
+        with self.metrics.phase('spawn'):
+            physics = BatchLanderPhysics([genome_id for genome_id, _ in genomes],
+                                         self.lander_config,
+                                         self.sim_width,
+                                         self.gravity,
+                                         seed=seed)
+            self.network = BatchNetwork(genomes, config)
+
+        with self.metrics.phase('terrain'):
+            self.generate_terrain(seed)
+        physics.set_terrain(self.terrain["query"])
+        recorder = self.start_recording(record, physics.ids, seed)
+
+        self.paused  = False
+        steps        = 0
+        start_time   = time.perf_counter()
+        render       = self.rendering()
+        self.dirty   = None
+        if self.termination:
+            self.termination.start(physics.count)
+
+        while physics.active().any():
+            due   = self.frame_due(steps)
+            frame = render and due
+
+            if not self.headless and due:
+                self.handle_events()
+                if frame and self.paused:
+                    self.dirty = None
+                    continue
+
+            with self.metrics.phase('sensors'):
+                physics.update()
+                flying = np.flatnonzero(physics.active())
+                sensors = physics.sensors(flying)
+                self.metrics.count('lander_steps', flying.size)
+
+            with self.metrics.phase('inference'):
+                physics.throttle_l[flying], physics.throttle_r[flying] = throttles(self.network.activate(sensors, flying))
+
+            termination = time.perf_counter()
+            if self.termination and flying.size:
+                finished = ~physics.active() & self.termination.cutoff
+                ending, stalled, falling, velocity, escaped = self.termination.decide(
+                    steps, flying,
+                    physics.positions()[0][flying], physics.distance_to_surface[flying],
+                    physics.vx[flying], physics.vy[flying], physics.fuel[flying], physics.mass[flying],
+                    physics.evaluate()[finished].max() if finished.any() else None)
+                if ending:
+                    break
+
+                physics.kill(np.isin(np.arange(physics.count), stalled), "stalled")
+                physics.kill(np.isin(np.arange(physics.count), falling[escaped]), "escaped the universe")
+                physics.touch_down(falling[~escaped], velocity[~escaped])
+            self.metrics.add('termination', time.perf_counter() - termination)
+
+            if recorder:
+                with self.metrics.phase('recording'):
+                    self.record_physics(recorder, physics)
+
+            # Contacts are resolved inside the batch step, so batch collisions count as physics
+            with self.metrics.phase('physics'):
+                for _ in range(self.substeps):
+                    physics.step(self.substep)
+            steps += 1
+
+            if frame:
+                with self.metrics.phase('render'):
+                    self.begin_frame()
+                    if self.debug_draw:
+                        self.draw_debug()
+                    self.end_frame(physics.draw(self.sim_screen))
+                self.clock.tick(self.frame_rate)
+                self.metrics.count('frames')
+
+        physics.update()
+
+        elapsed = time.perf_counter() - start_time
+        print(f"STEPS: {steps} | STEPS/SEC: {steps / max(elapsed, 1e-9):.1f}")
+        if self.termination:
+            print(self.termination.report(steps))
+
+        self.metrics.count('episodes')
+        self.metrics.count('steps', steps)
+        self.metrics.count('landers', physics.count)
+
+        if recorder:
+            with self.metrics.phase('recording'):
+                self.record_physics(recorder, physics)
+                recorder.close()
+
+        return dict(zip(physics.ids, physics.evaluate().tolist()))
+
+    def record_physics(self,recorder:TrajectoryRecorder,physics:BatchLanderPhysics):
+        x, y = physics.positions()
+        recorder.record({
+            "x"          : x,
+            "y"          : y,
+            "angle"      : physics.angle,
+            "vx"         : physics.vx,
+            "vy"         : physics.vy,
+            "throttle_l" : physics.throttle_l,
+            "throttle_r" : physics.throttle_r,
+            "fuel"       : physics.fuel,
+        }, np.where(~physics.alive, DEAD, np.where(physics.landed, LANDED, FLYING)))
+
+
+_worker_simulation: GeneticSimulation = None
+
+def _init_worker(simulation_config_file, lander_config_file, terrain_config_file, backend):
+    global _worker_simulation
+    _worker_simulation = GeneticSimulation(simulation_config_file,
+                                           lander_config_file,
+                                           terrain_config_file,
+                                           headless=True,
+                                           backend=backend)
+
+def _evaluate_shard(shard):
+    genomes, config, seeds, recording, generation = shard
+    _worker_simulation.generation = generation
+    _worker_simulation.metrics.reset()
+    results = _worker_simulation.evaluate_terrains(genomes, config, seeds, recording)
+    # A worker may be shut down right after its last shard, so its recordings are finished before returning
+    _worker_simulation.artifacts.drain()
+    return results, _worker_simulation.metrics.collect()
 
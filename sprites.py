@@ -0,0 +1,46 @@
+import pygame
+
+from collections import OrderedDict
+
+class SpriteAtlas:
+    """ Textures decoded once per process, with rotated frames quantized to `angle_step` degrees and LRU-evicted. """
+
+    def __init__(self,angle_step:float = 2.0,max_frames:int = 1024):
+        self.angle_step = angle_step
+        self.steps      = max(1, round(360 / angle_step))
+        self.max_frames = max_frames
+        self.textures   = {}
+        self.frames     = OrderedDict()
+
+    def texture(self,path:str) -> pygame.Surface:
+        if path not in self.textures:
+            self.textures[path] = pygame.image.load(path).convert_alpha()
+        return self.textures[path]
+
+    def rotated(self,path:str,angle_degrees:float) -> pygame.Surface:
+        """ `texture(path)` turned clockwise by angle_degrees, snapped to the nearest angle step. """
+        key = (path, round(angle_degrees / self.angle_step) % self.steps)
+
+        frame = self.frames.get(key)
+        if frame is not None:
+            self.frames.move_to_end(key)
+            return frame
+
+        frame = pygame.transform.rotate(self.texture(path), -key[1] * 360 / self.steps)
+        self.frames[key] = frame
+        if len(self.frames) > self.max_frames:
+            self.frames.popitem(last=False)
+        return frame
+
+    def prerender(self,path:str):
+        for step in range(min(self.steps, self.max_frames)):
+            self.rotated(path, step * 360 / self.steps)
+
+_atlases: dict[tuple[float,int],SpriteAtlas] = {}
+
+def sprite_atlas(angle_step:float = 2.0,max_frames:int = 1024) -> SpriteAtlas:
+    """ The process-wide atlas for these settings, shared by every lander. """
+    key = (angle_step, max_frames)
+    if key not in _atlases:
+        _atlases[key] = SpriteAtlas(angle_step, max_frames)
+    return _atlases[key]
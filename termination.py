@@ -0,0 +1,124 @@
+import numpy as np
+
+from fitness import fitness_kernel
+
+POLICIES = ('max_time', 'stall', 'ballistic', 'cutoff')
+
+class TerminationPolicy:
+    """ Decides which landers, or whole episodes, can stop early; counts what each policy saved. """
+
+    def __init__(self,config,timestep:float,gravity:float,engine_force:float,width:float):
+        self.timestep     = timestep
+        self.gravity      = gravity
+        self.engine_force = engine_force
+        self.width        = width
+
+        self.max_steps       = int(config.getfloat('max_sim_seconds', fallback=0) / timestep)
+        self.stall_steps     = config.getint('stall_steps', fallback=0)
+        self.stall_tolerance = config.getfloat('stall_tolerance', fallback=1.0)
+        self.ballistic       = config.getboolean('ballistic_shortcut', fallback=False)
+        self.cutoff          = config.getboolean('best_fitness_cutoff', fallback=False)
+
+        self.start(0)
+
+    def start(self,count:int):
+        self.reference   = np.full(count, np.nan)
+        self.still_for   = np.zeros(count, dtype=int)
+        self.retired_at  = {policy: [] for policy in POLICIES}
+        self.ended_by    = None
+        self.ended_with  = 0
+
+    def stalled(self,indices:np.ndarray,distance:np.ndarray) -> np.ndarray:
+        """ Landers whose altitude stayed within stall_tolerance for stall_steps steps. """
+        if not self.stall_steps:
+            return indices[:0]
+
+        moved = ~(np.abs(distance - self.reference[indices]) < self.stall_tolerance)
+        self.reference[indices[moved]]  = distance[moved]
+        self.still_for[indices[moved]]  = 0
+        self.still_for[indices[~moved]] += 1
+
+        return indices[self.still_for[indices] >= self.stall_steps]
+
+    def impact(self,x:np.ndarray,distance:np.ndarray,vx:np.ndarray,vy:np.ndarray):
+        """
+        Free-fall time, touchdown x and touchdown speed for landers `distance` px above the surface. Approximate:
+        the hull is a point, the ground stays at the height under the lander and slope is ignored.
+        """
+        distance = np.maximum(distance, 0.0)
+        if self.gravity > 0:
+            fall_time = (np.sqrt(vy**2 + 2 * self.gravity * distance) - vy) / self.gravity
+        else:
+            fall_time = distance / np.maximum(vy, 1e-9)
+        return fall_time, x + vx * fall_time, np.hypot(vx, vy + self.gravity * fall_time)
+
+    def falling_without_fuel(self,indices:np.ndarray,fuel:np.ndarray,vy:np.ndarray) -> np.ndarray:
+        if not self.ballistic:
+            return indices[:0]
+        return indices[(fuel <= 0) & (vy > 0)]
+
+    def best_case(self,distance:np.ndarray,vy:np.ndarray,fuel:np.ndarray,mass:np.ndarray) -> np.ndarray:
+        """ Optimistic fitness bound: touch down at zero distance, braking with both engines at full power. """
+        braking   = np.where(fuel > 0, 2 * self.engine_force / mass - self.gravity, -self.gravity)
+        falling   = np.maximum(vy, 0.0)
+        remaining = falling**2 - 2 * braking * np.maximum(distance, 0.0)
+        velocity  = np.sqrt(np.maximum(remaining, 0.0))
+        return fitness_kernel(np.zeros_like(velocity), velocity, np.ones_like(velocity, dtype=bool))
+
+    def should_cut(self,best_finished:float,distance,vy,fuel,mass) -> bool:
+        if not self.cutoff or best_finished is None or len(distance) == 0:
+            return False
+        return bool(np.all(self.best_case(distance, vy, fuel, mass) <= best_finished))
+
+    def out_of_time(self,step:int) -> bool:
+        return bool(self.max_steps) and step >= self.max_steps
+
+    def decide(self,step:int,indices:np.ndarray,x,distance,vx,vy,fuel,mass,best_finished:float = None):
+        """
+        Applies every enabled policy to the flying landers at `indices` (per-lander arrays alongside).
+        Returns (ending policy or None, stalled indices, ballistic indices, their touchdown speeds, escaped mask).
+        """
+        nothing = indices[:0]
+        if len(indices) == 0:
+            return None, nothing, nothing, np.zeros(0), np.zeros(0, dtype=bool)
+
+        if self.out_of_time(step):
+            self.end('max_time', step, len(indices))
+            return 'max_time', nothing, nothing, np.zeros(0), np.zeros(0, dtype=bool)
+
+        if self.should_cut(best_finished, distance, vy, fuel, mass):
+            self.end('cutoff', step, len(indices))
+            return 'cutoff', nothing, nothing, np.zeros(0), np.zeros(0, dtype=bool)
+
+        stalled = self.stalled(indices, distance)
+        self.retire('stall', stalled, step)
+
+        falling = np.isin(indices, self.falling_without_fuel(indices, fuel, vy)) & ~np.isin(indices, stalled)
+        fall_time, x_hit, v_hit = self.impact(x[falling], distance[falling], vx[falling], vy[falling])
+        escaped = (x_hit <= 0) | (x_hit >= self.width)
+        self.retire('ballistic', indices[falling], step, (fall_time / self.timestep).tolist())
+
+        return None, stalled, indices[falling], v_hit, escaped
+
+    def retire(self,policy:str,indices,step:int,skipped=None):
+        """ Records retired landers; `skipped` holds known per-lander steps saved, else it runs to episode end. """
+        if skipped is None:
+            skipped = [None] * len(indices)
+        self.retired_at[policy].extend((step, saved) for saved in skipped)
+
+    def end(self,policy:str,step:int,active:int):
+        """ Every active lander is retired with the steps left to the time limit, none when there is no limit. """
+        self.ended_by   = policy
+        self.ended_with = active
+        self.retire(policy, range(active), step, [max(self.max_steps - step, 0)] * active)
+
+    def report(self,steps:int) -> str:
+        parts = []
+        for policy in POLICIES:
+            retired = self.retired_at[policy]
+            saved   = sum(steps - step if skipped is None else skipped for step, skipped in retired)
+            parts.append(f"{policy}: {len(retired)} landers, {int(saved)} lander-steps")
+
+        if self.ended_by:
+            parts.append(f"episode ended by {self.ended_by} with {self.ended_with} active")
+        return "TERMINATION: " + " | ".join(parts)
@@ -0,0 +1,162 @@
+import os
+import bisect
+import hashlib
+import tempfile
+import numpy as np
+
+class TerrainQuery:
+    """ Constant-time height/slope lookups over a terrain polyline, built once per generation. """
+
+    def __init__(self,segment_coords:list):
+        self.segment_coords = segment_coords
+
+        self.xs     = np.array([segment_coords[0][0][0]] + [end[0] for _, end in segment_coords], dtype=float)
+        self.ys     = np.array([segment_coords[0][0][1]] + [end[1] for _, end in segment_coords], dtype=float)
+        self.slopes = np.diff(self.ys) / np.diff(self.xs)
+        self.count  = len(segment_coords)
+
+        self.x_start = float(self.xs[0])
+        self.x_end   = float(self.xs[-1])
+        self.ends    = self.xs[1:].tolist()
+
+        # generate_terrain spaces breaks evenly, only the closing segment may be shorter
+        lengths = np.diff(self.xs)
+        self.spacing = float(lengths[0])
+        self.uniform = bool(np.all(lengths[:-1] == self.spacing) and lengths[-1] <= self.spacing)
+
+    @classmethod
+    def from_points(cls,points:list):
+        vertices = []
+        for x, y in points:
+            if vertices and vertices[-1][0] == x:
+                continue
+            vertices.append((x, y))
+        return cls(list(zip(vertices[:-1], vertices[1:])))
+
+    def segment_index(self,x:float):
+        """ Index of the first segment ending to the right of x, or None when x is off the terrain. """
+        if not self.x_start < x < self.x_end:
+            return None
+        if self.uniform:
+            return min(int((x - self.x_start) // self.spacing), self.count - 1)
+        return bisect.bisect_right(self.ends, x)
+
+    def slope_and_height(self,index:int,x:float):
+        slope = float(self.slopes[index])
+        return slope, float(self.ys[index]) + slope * (x - float(self.xs[index]))
+
+    def height_at(self,x:float):
+        index = self.segment_index(x)
+        if index is None:
+            return None
+        return self.slope_and_height(index, x)[1]
+
+    def slope_at(self,x:float):
+        index = self.segment_index(x)
+        if index is None:
+            return None
+        return float(self.slopes[index])
+
+    def indices_at(self,xs:np.ndarray) -> np.ndarray:
+        xs = np.clip(np.asarray(xs, dtype=float), self.x_start, self.x_end)
+        if self.uniform:
+            indices = ((xs - self.x_start) // self.spacing).astype(int)
+        else:
+            indices = np.searchsorted(self.xs, xs, side='right') - 1
+        return np.clip(indices, 0, self.count - 1)
+
+    def heights_at(self,xs:np.ndarray) -> np.ndarray:
+        """ Heights for an array of x positions, clamped to the terrain's ends. """
+        xs      = np.clip(np.asarray(xs, dtype=float), self.x_start, self.x_end)
+        indices = self.indices_at(xs)
+        return self.ys[indices] + self.slopes[indices] * (xs - self.xs[indices])
+
+    def slopes_at(self,xs:np.ndarray) -> np.ndarray:
+        return self.slopes[self.indices_at(xs)]
+
+def landing_zone(heights:np.ndarray,width:int = 100) -> tuple[float,float]:
+    """ Centre of the flattest `width`-pixel window of a rasterized height field. """
+    roughness = np.concatenate(([0.0], np.cumsum(np.abs(np.diff(heights)))))
+    width     = min(width, len(heights) - 1)
+    start     = int(np.argmin(roughness[width:] - roughness[:-width]))
+    center_x  = start + width // 2
+    return float(center_x), float(heights[center_x])
+
+class TerrainCache:
+    """
+    Generated terrains keyed by (seed, config), kept in memory and as .npz files on disk. At most `max_files`
+    files are kept, the least recently used are deleted first (0 keeps every file).
+    """
+
+    def __init__(self,folder:str,max_memory:int = 64,max_files:int = 256):
+        self.folder     = folder
+        self.max_memory = max_memory
+        self.max_files  = max_files
+        self.memory     = {}
+
+        os.makedirs(self.folder, exist_ok=True)
+
+    def key(self,seed,*configs) -> str:
+        digest = hashlib.sha1(repr(seed).encode())
+        for config in configs:
+            digest.update(repr(sorted(config.items())).encode())
+        return digest.hexdigest()[:20]
+
+    def path(self,key:str) -> str:
+        return os.path.join(self.folder, f"{key}.npz")
+
+    def load(self,key:str):
+        if key in self.memory:
+            return self.memory[key]
+
+        try:
+            with np.load(self.path(key)) as data:
+                terrain = {name: data[name] for name in data.files}
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+
+        # The modification time doubles as the last use for eviction
+        try:
+            os.utime(self.path(key))
+        except OSError:
+            pass
+        self.remember(key, terrain)
+        return terrain
+
+    def store(self,key:str,terrain:dict):
+        self.remember(key, terrain)
+
+        # Workers may race on the same key, so publish each file atomically
+        handle, temp_path = tempfile.mkstemp(dir=self.folder, prefix=".", suffix=".npz")
+        with os.fdopen(handle, 'wb') as file:
+            np.savez(file, **terrain)
+        os.replace(temp_path, self.path(key))
+        self.evict()
+
+    def evict(self):
+        if not self.max_files:
+            return
+
+        files = []
+        for entry in os.scandir(self.folder):
+            # Files still being written start with a dot
+            if entry.name.startswith('.'):
+                continue
+            try:
+                files.append((entry.stat().st_mtime, entry.path))
+            except OSError:
+                continue
+        if len(files) <= self.max_files:
+            return
+
+        for _, path in sorted(files)[:len(files) - self.max_files]:
+            # Another worker may have deleted it already
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def remember(self,key:str,terrain:dict):
+        if len(self.memory) >= self.max_memory:
+            self.memory.pop(next(iter(self.memory)))
+        self.memory[key] = terrain
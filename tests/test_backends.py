@@ -0,0 +1,30 @@
+import os
+import random
+
+import neat
+import numpy as np
+
+from simulation import GeneticSimulation
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_backends_agree(monkeypatch):
+    # Assets and configs are looked up from the repository root
+    monkeypatch.chdir(ROOT)
+    config = neat.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet, neat.DefaultStagnation,
+                         'configs/simulation.ini')
+    random.seed(1234)
+    genomes = list(neat.Population(config).population.items())[:40]
+
+    fitness = {}
+    for backend in ('pymunk', 'batch'):
+        sim = GeneticSimulation('configs/simulation.ini', 'configs/lander.ini', 'configs/terrain.ini',
+                                headless=True, backend=backend, seed=1234)
+        sim.terrain_cache = None
+        fitness[backend] = sim.evaluate(genomes, config, 1234)
+
+    assert fitness['pymunk'].keys() == fitness['batch'].keys()
+    ids = list(fitness['pymunk'])
+    # The batch integrator only approximates pymunk's contact solver: scores may drift by 2% (measured under 1%),
+    # far inside the 2000 crash penalty, so every genome still lands or crashes the same on both
+    assert np.allclose([fitness['batch'][key] for key in ids], [fitness['pymunk'][key] for key in ids], rtol=0.02, atol=1.0)
@@ -0,0 +1,33 @@
+import os
+import random
+
+import neat
+import numpy as np
+import pytest
+
+from batch_network import BatchNetwork
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture(scope='module')
+def population():
+    random.seed(1234)
+    config = neat.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet, neat.DefaultStagnation,
+                         os.path.join(ROOT, 'configs/simulation.ini'))
+    config.pop_size = 200
+    genomes = list(neat.Population(config).population.items())
+    for _, genome in genomes:
+        for _ in range(8):
+            genome.mutate_add_node(config.genome_config)
+    inputs = np.random.default_rng(1234).uniform(-1, 1, (len(genomes), config.genome_config.num_inputs))
+    return genomes, config, inputs
+
+def test_subset_matches_neat(population):
+    genomes, config, inputs = population
+    network  = BatchNetwork(genomes, config)
+    expected = np.array([neat.nn.FeedForwardNetwork.create(genome, config).activate(row)
+                         for (_, genome), row in zip(genomes, inputs.tolist())])
+
+    # Shrinking active sets, as episodes produce them, then every genome again
+    for rows in [np.arange(1, 200), np.arange(3, 200, 2), np.arange(0, 200, 50), np.arange(200)]:
+        assert np.allclose(network.activate(inputs[rows], rows), expected[rows])
@@ -0,0 +1,33 @@
+import os
+import random
+
+import neat
+import numpy as np
+
+from fitness import FitnessAggregate,fitness_kernel
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_landed_ranks_above_crashed():
+    landed, crashed = fitness_kernel(np.array([5.0, 400.0]), np.array([2.0, 30.0]), np.array([True, False]))
+    assert landed > crashed
+
+    # neat-python keeps and breeds the highest fitness whatever fitness_criterion says
+    random.seed(1234)
+    config = neat.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet, neat.DefaultStagnation,
+                         os.path.join(ROOT, 'configs/simulation.ini'))
+    config.pop_size = 20
+    population = neat.Population(config)
+    pilot      = next(iter(population.population))
+
+    def evaluate(genomes,config):
+        for genome_id, genome in genomes:
+            genome.fitness = float(landed if genome_id == pilot else crashed)
+
+    assert population.run(evaluate, 1).key == pilot
+
+def test_worst_aggregate_keeps_the_lowest_fitness():
+    aggregate = FitnessAggregate([1, 2], 'worst')
+    aggregate.update({1: -10.0, 2: -2000.0})
+    aggregate.update({1: -300.0, 2: -5.0})
+    assert aggregate.result() == {1: -300.0, 2: -2000.0}
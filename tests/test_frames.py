@@ -0,0 +1,13 @@
+import os
+
+from simulation import GeneticSimulation
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_frames_keep_pace_with_simulated_time(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    sim = GeneticSimulation('configs/simulation.ini', 'configs/lander.ini', 'configs/terrain.ini', headless=True, seed=1234)
+    # 60 / 24 rounded to 2 ticks per frame used to draw 30 frames per simulated second instead of 24
+    for physics_hz, fps, frames in ((60, 24, 240), (100, 60, 600), (120, 60, 600), (30, 60, 300)):
+        sim.physics_hz, sim.frame_rate = physics_hz, min(fps, physics_hz)
+        assert sum(sim.frame_due(steps) for steps in range(10 * physics_hz)) == frames
@@ -0,0 +1,34 @@
+import os
+import random
+import configparser
+
+import neat
+
+from simulation import GeneticSimulation
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_landed_landers_leave_the_space(tmp_path,monkeypatch):
+    # Every touchdown counts as safe, so landed landers would otherwise stay in the space
+    lander = configparser.ConfigParser()
+    lander.read(os.path.join(ROOT, 'configs/lander.ini'))
+    lander['LANDER']['max_land_vel'] = '100000'
+    with open(tmp_path / 'lander.ini', 'w') as file:
+        lander.write(file)
+
+    # Assets and configs are looked up from the repository root
+    monkeypatch.chdir(ROOT)
+    sim = GeneticSimulation('configs/simulation.ini', str(tmp_path / 'lander.ini'), 'configs/terrain.ini',
+                            headless=True, backend='pymunk', seed=1234)
+    sim.terrain_cache = None
+
+    random.seed(1234)
+    config  = neat.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet, neat.DefaultStagnation,
+                          'configs/simulation.ini')
+    genomes = list(neat.Population(config).population.items())[:50]
+    sim.evaluate(genomes, config, 1234)
+
+    landed = sum(lander.landed for lander in sim.landers)
+    assert landed
+    # One contact step per landing, not one per substep for the rest of the episode
+    assert sim.metrics.counts['collisions'] <= 2 * landed
@@ -0,0 +1,68 @@
+import threading
+
+import json
+
+from monitor import RunDashboard, FitnessTail, MetricsTail
+
+def write_run(folder,name,rows):
+    run = folder / name
+    run.mkdir(exist_ok=True)
+    with open(run / 'fitness_data.csv', 'a') as file:
+        if file.tell() == 0:
+            file.write("Run,Avg Fitness,Best Fitness\n")
+        file.writelines(f"{generation},{fitness},{fitness / 2}\n" for generation, fitness in rows)
+
+def test_late_and_failing_polls(tmp_path,capsys):
+    write_run(tmp_path, 'slow', [(0, -10.0)])
+    write_run(tmp_path, 'broken', [(0, -20.0)])
+    dashboard = RunDashboard(str(tmp_path), threads=2, budget=0.05)
+    release   = threading.Event()
+    try:
+        assert dashboard.refresh()
+        assert [run["name"] for run in dashboard.summary()] == ['slow', 'broken']
+
+        slow, broken = (dashboard.tails[str(tmp_path / name / 'fitness_data.csv')] for name in ('slow', 'broken'))
+        poll = slow.poll
+        def late_poll():
+            release.wait()
+            return poll()
+        def failing_poll():
+            raise ValueError("corrupt row")
+        slow.poll, broken.poll = late_poll, failing_poll
+
+        # The slow run keeps its last summary while busy, the broken one is logged and kept too
+        write_run(tmp_path, 'slow', [(1, -5.0)])
+        dashboard.refresh()
+        assert [run["generations"] for run in dashboard.summary()] == [0, 0]
+        assert "corrupt row" in capsys.readouterr().out
+
+        # A poll that finishes after its budget is picked up by the next refresh
+        release.set()
+        dashboard.pending[str(tmp_path / 'slow' / 'fitness_data.csv')].result()
+        slow.poll = poll
+        assert dashboard.refresh()
+        assert {run["name"]: run["generations"] for run in dashboard.summary()} == {'slow': 1, 'broken': 0}
+    finally:
+        release.set()
+        dashboard.close()
+
+def test_malformed_lines_are_skipped(tmp_path,capsys):
+    csv = tmp_path / 'fitness_data.csv'
+    csv.write_text("Run,Avg Fitness,Best Fitness\n0,-10.0,-5.0\n1,oops,-4.0\n2,-8.0\n3,-6.0,-3.0\n")
+    tail = FitnessTail(str(csv))
+    assert tail.poll()
+    assert tail['Run'].tolist() == [0.0, 3.0]
+    assert capsys.readouterr().out.count("Skipping malformed line") == 2
+
+    # Rows after a bad one keep arriving on later polls
+    with open(csv, 'a') as file:
+        file.write("4,-5.0,-2.5\n")
+    assert tail.poll()
+    assert tail['Run'].tolist() == [0.0, 3.0, 4.0]
+
+    metrics = tmp_path / 'metrics.jsonl'
+    record  = {"generation": 0, "wall": 1.0, "phases": {"physics": 0.5}, "counts": {"steps": 10}}
+    metrics.write_text(json.dumps(record) + "\n{truncated\n" + json.dumps({**record, "generation": 1}) + "\n")
+    tail = MetricsTail(str(metrics))
+    assert tail.poll()
+    assert tail['Run'].tolist() == [0.0, 1.0]
@@ -0,0 +1,22 @@
+import numpy as np
+
+from perlin_noise import PerlinNoise
+
+from utils import Noise, GradientNoise
+
+def test_no_seed_gives_periodic_noise():
+    # Seeds 124, 139, 174, 184 and 210 used to draw a 0 component seed, whose gradients repeat every lattice cell
+    xs = np.linspace(0, 1, 97)
+    for seed in range(300):
+        noise = Noise(seed)
+        for component in (noise.noise1, noise.noise2, noise.noise3):
+            coords = np.stack([xs, np.zeros_like(xs)], axis=-1)
+            shift  = np.array([1 / component.octaves, 0])
+            assert not np.allclose(component(coords), component(coords + shift)), seed
+
+def test_matches_perlin_noise_at_negative_coordinates():
+    coords = np.random.default_rng(1234).uniform(-3, 3, (200, 2))
+    for octaves, seed in ((2, 7), (4, 31), (6, 99)):
+        reference = PerlinNoise(octaves=octaves, seed=seed)
+        expected  = [reference(list(coord)) for coord in coords]
+        assert np.allclose(GradientNoise(octaves=octaves, seed=seed)(coords), expected, atol=1e-12)
@@ -0,0 +1,35 @@
+import os
+import random
+
+import neat
+import pytest
+
+from recorder import FLYING,Trajectory
+from simulation import GeneticSimulation
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.mark.parametrize('backend', ['pymunk', 'batch'])
+def test_one_frame_per_tick_and_the_final_state(tmp_path,monkeypatch,backend):
+    # Assets and configs are looked up from the repository root
+    monkeypatch.chdir(ROOT)
+    sim = GeneticSimulation('configs/simulation.ini', 'configs/lander.ini', 'configs/terrain.ini',
+                            headless=True, backend=backend, seed=1234)
+    sim.terrain_cache = None
+
+    random.seed(1234)
+    config  = neat.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet, neat.DefaultStagnation,
+                          'configs/simulation.ini')
+    genomes = list(neat.Population(config).population.items())[:10]
+    path    = str(tmp_path / 'episode.npz')
+    sim.evaluate(genomes, config, 1234, record=path)
+    sim.artifacts.drain()
+
+    trajectory = Trajectory(path)
+    try:
+        assert trajectory.ticks == sim.metrics.counts['steps'] + 1
+        # The episode ends on the first tick nobody flies, and that state is stored once
+        assert (trajectory.state(trajectory.ticks - 2)["status"] == FLYING).any()
+        assert not (trajectory.state(trajectory.ticks - 1)["status"] == FLYING).any()
+    finally:
+        trajectory.close()
@@ -0,0 +1,52 @@
+import os
+import random
+import configparser
+
+import neat
+import pytest
+
+from simulation import GeneticSimulation
+from termination import TerminationPolicy
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def simulation_config(tmp_path,**termination) -> str:
+    config = configparser.ConfigParser()
+    config.read(os.path.join(ROOT, 'configs/simulation.ini'))
+    config['TERMINATION'].update({key: str(value) for key, value in termination.items()})
+    path = tmp_path / 'simulation.ini'
+    with open(path, 'w') as file:
+        config.write(file)
+    return str(path)
+
+@pytest.mark.parametrize('backend', ['pymunk', 'batch'])
+def test_max_time_stops_on_the_limit(tmp_path,monkeypatch,backend):
+    # Assets and configs are looked up from the repository root
+    monkeypatch.chdir(ROOT)
+    path = simulation_config(tmp_path, max_sim_seconds=5, stall_steps=0, ballistic_shortcut=False, best_fitness_cutoff=False)
+    sim  = GeneticSimulation(path,
+                             'configs/lander.ini',
+                             'configs/terrain.ini',
+                             headless=True,
+                             backend=backend,
+                             seed=1234)
+    sim.terrain_cache = None
+
+    random.seed(1234)
+    config  = neat.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet, neat.DefaultStagnation, path)
+    genomes = list(neat.Population(config).population.items())[:20]
+    sim.evaluate(genomes, config, 1234)
+
+    policy = sim.termination
+    assert sim.metrics.counts['steps'] == policy.max_steps == 300
+    assert policy.ended_by == 'max_time'
+    assert 0 < policy.ended_with <= len(genomes)
+    assert len(policy.retired_at['max_time']) == policy.ended_with
+
+def test_ending_policies_report_the_steps_they_saved():
+    config = configparser.ConfigParser()
+    config.read_dict({'TERMINATION': {'max_sim_seconds': 5, 'best_fitness_cutoff': True}})
+    policy = TerminationPolicy(config['TERMINATION'], 1 / 60, 1.624, 10.0, 1700)
+    policy.start(4)
+    policy.end('cutoff', 100, 4)
+    assert "cutoff: 4 landers, 800 lander-steps" in policy.report(100)
@@ -0,0 +1,63 @@
+import pygame
+
+from collections import OrderedDict
+
+_fonts: dict[tuple[str,int],pygame.font.Font] = {}
+
+def get_font(name:str = None,size:int = 18) -> pygame.font.Font:
+    """ SysFont does a system font lookup, so each (name, size) is created once per process. """
+    key = (name, size)
+    if key not in _fonts:
+        _fonts[key] = pygame.font.SysFont(name, size)
+    return _fonts[key]
+
+class TextRenderer:
+    """ Static strings cached as whole surfaces, changing values composited from cached glyphs. """
+
+    def __init__(self,font:pygame.font.Font,antialias:bool = False,max_strings:int = 512):
+        self.font        = font
+        self.antialias   = antialias
+        self.max_strings = max_strings
+        self.strings     = OrderedDict()
+        self.glyphs      = {}
+
+    def render(self,text:str,color = 'WHITE') -> pygame.Surface:
+        key = (text, color)
+
+        surface = self.strings.get(key)
+        if surface is not None:
+            self.strings.move_to_end(key)
+            return surface
+
+        surface = self.font.render(text, self.antialias, color)
+        self.strings[key] = surface
+        if len(self.strings) > self.max_strings:
+            self.strings.popitem(last=False)
+        return surface
+
+    def glyph(self,char:str,color = 'WHITE') -> pygame.Surface:
+        key = (char, color)
+        if key not in self.glyphs:
+            self.glyphs[key] = self.font.render(char, self.antialias, color)
+        return self.glyphs[key]
+
+    def size(self,label:str,value:str = "",color = 'WHITE') -> tuple[int,int]:
+        width = self.render(label, color).get_width() + sum(self.glyph(char, color).get_width() for char in value)
+        return width, self.font.get_linesize()
+
+    def blit(self,screen:pygame.Surface,label:str,value:str = "",position = (0,0),color = 'WHITE',center:bool = False) -> pygame.Rect:
+        """ Draws `label` followed by `value` at position (top-left, or centre), returning the rect touched. """
+        rect = pygame.Rect(position, self.size(label, value, color))
+        if center:
+            rect.center = position
+
+        surface = self.render(label, color)
+        screen.blit(surface, rect.topleft)
+
+        x = rect.x + surface.get_width()
+        for char in value:
+            glyph = self.glyph(char, color)
+            screen.blit(glyph, (x, rect.y))
+            x += glyph.get_width()
+
+        return rect
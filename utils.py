@@ -1,15 +1,54 @@
 import random
 import warnings
+import itertools
 
 import graphviz
 import matplotlib.pyplot as plt
 import numpy as np
 
-from perlin_noise import PerlinNoise
 
-noise1 = PerlinNoise(octaves=2)
-noise2 = PerlinNoise(octaves=6)
-noise3 = PerlinNoise(octaves=2)
+class GradientNoise:
+    """ Vectorized drop-in for perlin_noise.PerlinNoise: same lattice gradients, whole arrays per call. """
+
+    def __init__(self,octaves=1,seed=None):
+        self.octaves   = octaves
+        self.seed      = random.randint(1, 10**5) if seed is None else seed
+        self.gradients = {}
+
+    def lattice_gradients(self,corners:np.ndarray) -> np.ndarray:
+        dims   = corners.shape[-1]
+        # perlin_noise.tools.hasher is max(1, abs(dot + 1)), not abs(dot) + 1: negative corners hash differently
+        hashes = np.maximum(1, np.abs(corners @ (10 ** np.arange(dims)) + 1))
+
+        unique, inverse = np.unique(hashes, return_inverse=True)
+        table = np.empty((len(unique), dims))
+        for row, lattice_hash in enumerate(unique.tolist()):
+            if lattice_hash not in self.gradients:
+                # Same per-corner stream as perlin_noise's RandVec, without touching the global RNG
+                rng = random.Random(self.seed * lattice_hash)
+                self.gradients[lattice_hash] = [rng.uniform(-1, 1) for _ in range(dims)]
+            table[row] = self.gradients[lattice_hash]
+
+        return table[inverse.reshape(hashes.shape)]
+
+    def __call__(self,coords):
+        coords = np.asarray(coords, dtype=float) * self.octaves
+        lower  = np.floor(coords).astype(np.int64)
+        value  = np.zeros(coords.shape[:-1])
+
+        for offset in itertools.product((0, 1), repeat=coords.shape[-1]):
+            corners = lower + np.array(offset)
+            dists   = coords - corners
+            fade    = 1 - np.abs(dists)
+            weight  = np.prod(6 * fade**5 - 15 * fade**4 + 10 * fade**3, axis=-1)
+            value  += weight * np.sum(self.lattice_gradients(corners) * dists, axis=-1)
+
+        return value
+
+
+noise1 = GradientNoise(octaves=2)
+noise2 = GradientNoise(octaves=6)
+noise3 = GradientNoise(octaves=2)
 
 def generate_noise(coord):
     noise_val =  0.7 * noise1(coord)
@@ -20,10 +59,12 @@ def generate_noise(coord):
 
 
 class Noise:
-    def __init__(self):
-        self.noise1 = PerlinNoise(octaves=2,seed=random.randint(0,100))
-        self.noise2 = PerlinNoise(octaves=4,seed=random.randint(0,100))
-        self.noise3 = PerlinNoise(octaves=2,seed=random.randint(0,100))
+    def __init__(self,seed=None):
+        # Gradients are seeded with seed * lattice hash, so a 0 would give every corner the same one
+        rng = random.Random(seed)
+        self.noise1 = GradientNoise(octaves=2,seed=rng.randint(1,100))
+        self.noise2 = GradientNoise(octaves=4,seed=rng.randint(1,100))
+        self.noise3 = GradientNoise(octaves=2,seed=rng.randint(1,100))
 
     def generate_noise(self,coord):
         noise_val =  5.0 * self.noise1(coord)
@@ -32,10 +73,24 @@ class Noise:
     
         return noise_val
 
+    def generate_profile(self,xs) -> np.ndarray:
+        """ Noise along the x axis (y = 0) for a whole array of normalized x positions. """
+        xs = np.asarray(xs, dtype=float)
+        return self.generate_noise(np.stack([xs, np.zeros_like(xs)], axis=-1))
+
+    def generate_map(self,xs,ys) -> np.ndarray:
+        """ 2D height map of shape (len(ys), len(xs)); rows are slices of one noise field, so nearby rows are correlated. """
+        grid_x, grid_y = np.meshgrid(np.asarray(xs, dtype=float), np.asarray(ys, dtype=float))
+        return self.generate_noise(np.stack([grid_x, grid_y], axis=-1))
+
 def pairwise(iterable):
     a = iter(iterable)
     return zip(a, a)
 
+def sub_seed(seed:int,*keys) -> int:
+    """ A 32-bit seed derived from `seed` and `keys`, identical in every process and on every run. """
+    return random.Random("-".join(str(part) for part in (seed,) + keys)).randrange(2**32)
+
 
 def plot_stats(statistics, ylog=False, view=False, filename='avg_fitness.svg'):
     """ Plots the population's average and best fitness. """